@@ -1,12 +1,50 @@
+import gc
+import os
+import sys
+import threading
+from functools import partial
+
+import startup_profile
 import dash
-from dash import dcc, html, Input, Output, callback_context
+from dash import dcc, html, Input, Output, State, ClientsideFunction, callback_context, no_update
 import pandas as pd
 import plotly.graph_objs as go
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler
+startup_profile.mark('third-party imports')
+from data_store import SymbolStore, mapped_frame, mapped_symbol_store
+from figure_cache import FigureCache
+from metrics import ForecastMetrics
+from decimation import decimate, max_points_for_width, min_points_for_width, minmax_indices
+from config import (BINARY_FIGURES, CLIENTSIDE_SYMBOL_SWITCHING, COMPRESS_MIN_SIZE, COMPRESS_RESPONSES, DEMO_DATA, INFERENCE_BACKEND, MMAP_STORE, MODEL_PATH,
+                    METRICS, METRICS_DIR, MODEL_WATCH_INTERVAL, NSE_DATA_PATH, PRELOAD, STOCK_DATA_PATH, STORE_DIR, STREAM_FEED, STREAM_INTERVAL_MS, STREAM_MAX_POINTS,
+                    TFLITE_MODEL_PATH)
+from inference import InferenceEngine, ModelUnavailable, predict_in_subprocess
+from data_loader import DEMO_SEED, demo_nse_frame, demo_stock_frame, demo_token, load_nse, load_stocks, source_token
+from feeds import FeedRunner, open_feed
+from retraining import ModelWatcher, describe, read_status, start_retraining
+from payloads import TYPED_ARRAY_PLOTLYJS, enable_compression, encode_figure, typed_arrays_supported
+from pyramid import OHLCVPyramid
+from indicators import IndicatorEngine
+from instrumentation import MetricsFlusher, MetricsRegistry, instrument_callbacks
+startup_profile.mark('app module imports')
 
 app = dash.Dash(__name__)
 server = app.server
+if COMPRESS_RESPONSES:
+    enable_compression(server, COMPRESS_MIN_SIZE)
+
+# Typed-array figures only when the plotly.js Dash serves can decode them
+binary_figures = BINARY_FIGURES
+if BINARY_FIGURES:
+    binary_figures, plotlyjs_version = typed_arrays_supported()
+    if not binary_figures:
+        print(f"STOCKS_BINARY_FIGURES ignored: plotly.js {plotlyjs_version} cannot decode typed arrays "
+              f"(needs {'.'.join(map(str, TYPED_ARRAY_PLOTLYJS))} or later)")
+
+# Callback latency, payload size and error counts, served on /metrics
+metrics_registry = MetricsRegistry(METRICS_DIR or None)
+if METRICS:
+    instrument_callbacks(app, metrics_registry)
 
 # Add CSS animations
 app.index_string = '''
@@ -232,56 +270,265 @@ app.index_string = '''
 </html>
 '''
 
-# Create dummy data for demonstration
-print("Creating dummy data for demonstration...")
+# Display names for known tickers; anything else is shown by its symbol
+STOCK_NAMES = {
+    'FB': 'Facebook',
+    'AAPL': 'Apple',
+    'TSLA': 'Tesla',
+    'MSFT': 'Microsoft',
+    'GOOGL': 'Google',
+    'AMZN': 'Amazon',
+    'AABA': 'Altaba'
+}
 
-# Create dummy NSE-TATA data
-dates = pd.date_range('2020-01-01', periods=1000, freq='D')
-close_prices = np.random.randn(1000).cumsum() + 100
-df_nse = pd.DataFrame({
-    'Date': dates,
-    'Close': close_prices
-})
+DEMO_SYMBOLS = ['FB', 'AAPL', 'TSLA', 'MSFT']
+
+if DEMO_DATA:
+    print("Creating dummy data for demonstration...")
+    build_nse = demo_nse_frame
+    build_stocks = lambda: demo_stock_frame(DEMO_SYMBOLS)
+    nse_token = demo_token('nse')
+    stock_token = demo_token('stocks', DEMO_SYMBOLS)
+else:
+    print("Loading market data...")
+    build_nse = lambda: load_nse(NSE_DATA_PATH)
+    build_stocks = lambda: load_stocks(STOCK_DATA_PATH)
+    nse_token = source_token(NSE_DATA_PATH)
+    stock_token = source_token(STOCK_DATA_PATH)
+
+if MMAP_STORE:
+    # Map the shared column store, building it on first use, so every worker
+    # serves the same data from one copy in memory
+    df_nse = mapped_frame(os.path.join(STORE_DIR, f'nse-{nse_token}'), build_nse)
+    stock_store = mapped_symbol_store(os.path.join(STORE_DIR, f'stocks-{stock_token}'), build_stocks)
+else:
+    df_nse = build_nse()
+    # Index the multi-stock frame by symbol once so callbacks slice instead of scanning
+    stock_store = SymbolStore(build_stocks())
+df = stock_store.frame
+
+# Weekly/monthly/quarterly bars for long-range charts, resampled once at load
+stock_pyramid = OHLCVPyramid(stock_store)
+nse_pyramid = OHLCVPyramid(SymbolStore(df_nse.assign(Symbol='NSE'), key='Symbol'))
+
+# Technical indicators for the comparison chart, computed for every symbol on
+# first use and cached per (symbol, indicator, params)
+indicator_engine = IndicatorEngine(stock_store)
+INDICATOR_OPTIONS = [
+    {'label': 'SMA 20', 'value': 'sma'},
+    {'label': 'EMA 20', 'value': 'ema'},
+    {'label': 'Bollinger 20, 2σ', 'value': 'bollinger'},
+    {'label': 'VWAP 20', 'value': 'vwap'},
+    {'label': 'RSI 14', 'value': 'rsi'},
+    {'label': 'ATR 14', 'value': 'atr'},
+]
+# Indicators drawn in a lower pane instead of over the prices
+PANE_INDICATORS = {'rsi': 'y2', 'atr': 'y3'}
+INDICATOR_COLORS = {
+    'sma': '#ffa502',
+    'ema': '#1e90ff',
+    'middle': '#a29bfe',
+    'upper': '#a29bfe',
+    'lower': '#a29bfe',
+    'vwap': '#ff6b81',
+    'rsi': '#eccc68',
+    'atr': '#70a1ff',
+}
 
 df_nse.index = df_nse['Date']
-new_data = df_nse[['Close']].copy()
+new_data = df_nse[['Close']]
 
 dataset = new_data.values
 train_size = int(len(dataset) * 0.8)
 train = dataset[0:train_size, :]
 valid = dataset[train_size:, :]
+startup_profile.mark('data load')
+
+# LSTM predictions for the validation span. The model (and TensorFlow with
+# it) is only loaded when a page first needs predictions, so workers boot
+# without it; without a usable model, seeded placeholder values are shown
+inference_engine = InferenceEngine(TFLITE_MODEL_PATH if INFERENCE_BACKEND == 'tflite' else MODEL_PATH,
+                                   backend=INFERENCE_BACKEND)
 
-# Create dummy predictions
-closing_price = np.random.randn(len(valid)) * 10 + valid[:, 0].mean()
-closing_price = closing_price.reshape(-1, 1)
+def placeholder_predictions(count, offset=0):
+    rng = np.random.default_rng([DEMO_SEED, offset])
+    return rng.standard_normal(count) * 10 + valid[:, 0].mean()
+
+# in_subprocess runs the model in a spawned helper instead (see preload());
+# frame defaults to the current NSE closes
+def predict_closing_prices(in_subprocess=False, frame=None):
+    if frame is None:
+        frame = new_data
+    requests = {'NSE': (frame.index, frame['Close'].to_numpy(), train_size)}
+    try:
+        if not in_subprocess:
+            return inference_engine.predict(requests)['NSE']
+        predictions, version = predict_in_subprocess(inference_engine.model_path, requests, INFERENCE_BACKEND)
+        inference_engine.adopt(version)
+        return predictions['NSE']
+    except ModelUnavailable as e:
+        if in_subprocess:
+            inference_engine.adopt(None)
+        print(f"Model unavailable, showing placeholder predictions: {e}")
+        return placeholder_predictions(len(frame) - train_size)
 
 train_data = new_data[:train_size]
 valid_data = new_data[train_size:].copy()
-valid_data['Predictions'] = closing_price.flatten()
-
-# Create dummy stock data for the second tab
-stock_symbols = ['FB', 'AAPL', 'TSLA', 'MSFT']
-stock_names = ['Facebook', 'Apple', 'Tesla', 'Microsoft']
-
-# Create more realistic stock data
-dates = pd.date_range('2020-01-01', periods=250, freq='D')
-df = pd.DataFrame()
-
-for i, symbol in enumerate(stock_symbols):
-    symbol_data = pd.DataFrame({
-        'Stock': [symbol] * 250,
-        'Date': dates,
-        'High': np.random.randn(250).cumsum() + 100 + i*20,
-        'Low': np.random.randn(250).cumsum() + 90 + i*20,
-        'Volume': np.random.randint(1000000, 10000000, 250)
-    })
-    df = pd.concat([df, symbol_data], ignore_index=True)
+prediction_lock = threading.Lock()
+
+# Forecast-error metrics over the validation span, extended as bars append
+forecast_metrics = ForecastMetrics()
+
+def ensure_predictions(in_subprocess=False):
+    global valid_data
+    if 'Predictions' in valid_data:
+        return
+    with prediction_lock:
+        if 'Predictions' not in valid_data:
+            data = valid_data.copy()
+            data['Predictions'] = predict_closing_prices(in_subprocess)
+            valid_data = data
+            forecast_metrics.update({'NSE': (data['Close'].to_numpy(), data['Predictions'].to_numpy())})
+            compute_statistics()
+
+# Symbols shown on the multi-stock page; demo data keeps its original order
+stock_symbols = DEMO_SYMBOLS if DEMO_DATA else stock_store.symbols
+stock_names = [STOCK_NAMES.get(symbol, symbol) for symbol in stock_symbols]
+default_symbol = stock_symbols[0]
+# Dash ids cannot hold '.' (BRK.B), so the quick-select and quick-volume
+# buttons are keyed by the symbol's position instead of its ticker
+quick_symbols = {str(i): symbol for i, symbol in enumerate(stock_symbols)}
+
+# Built figures are cached per (chart, symbols, data version); bump the version
+# through reload_data() whenever the frames above are replaced
+data_version = 0
+figure_cache = FigureCache(max_entries=256, max_bytes=128 * 1024 * 1024)
+
+# Page trees are built once per data version and reused across nav clicks
+page_cache = {}
+page_cache_stats = {'hit': 0, 'miss': 0}
+
+def cache_samples():
+    return [('stocks_cache_requests_total', {'cache': cache, 'result': result}, count)
+            for cache, counts in (
+                ('figure', {'hit': figure_cache.hits, 'miss': figure_cache.misses}),
+                ('page', page_cache_stats),
+                ('prediction', {'hit': inference_engine.hits, 'miss': inference_engine.misses}))
+            for result, count in counts.items()]
+
+metrics_registry.add_collector(cache_samples)
+
+# Held while the NSE frames are appended to and while pages are built, so a
+# page and the stream cursor it carries always see the same rows
+data_lock = threading.RLock()
+
+def reload_data():
+    global data_version
+    data_version += 1
+    figure_cache.clear()
+    page_cache.clear()
+    build_pages()
 
 # Calculate some statistics for the dashboard
-current_price = valid_data['Close'].iloc[-1]
-predicted_price = valid_data['Predictions'].iloc[-1]
-price_change = predicted_price - current_price
-price_change_pct = (price_change / current_price) * 100
+def compute_statistics():
+    global current_price, predicted_price, price_change, price_change_pct
+    current_price = valid_data['Close'].iloc[-1]
+    predicted_price = valid_data['Predictions'].iloc[-1]
+    price_change = predicted_price - current_price
+    price_change_pct = (price_change / current_price) * 100
+
+# Append newly arrived NSE bars (a frame of Close prices indexed by date).
+# Only the windows for the new bars are predicted; the results are appended
+# to valid_data and the pages are rebuilt for the new data version. Streaming
+# ticks pass rebuild=False: open charts pick the rows up through extendData
+# and only the NSE pages are dropped, to be rebuilt on the next visit.
+def append_nse_bars(bars, rebuild=True):
+    with data_lock:
+        return _append_nse_bars(bars, rebuild)
+
+def _append_nse_bars(bars, rebuild):
+    global new_data, valid_data
+    ensure_predictions()
+    bars = bars[['Close']]
+    new_data = pd.concat([new_data, bars])
+    try:
+        predictions = inference_engine.extend({
+            'NSE': (new_data.index, new_data['Close'].to_numpy(), len(bars))
+        })['NSE']
+    except ModelUnavailable:
+        predictions = placeholder_predictions(len(bars), len(new_data))
+    
+    rows = bars.copy()
+    rows['Predictions'] = predictions
+    valid_data = pd.concat([valid_data, rows])
+    forecast_metrics.update({'NSE': (rows['Close'].to_numpy(), rows['Predictions'].to_numpy())})
+    compute_statistics()
+    if rebuild:
+        reload_data()
+    else:
+        for button_id in ('btn-overview', 'btn-nse'):
+            page_cache.pop((button_id, data_version), None)
+    return rows
+
+def on_stream_bars(bars):
+    # Feeds may resend bars after a reconnect; keep only ones past the last
+    # stored date, checked under the lock so concurrent ticks cannot both
+    # append the same dates
+    bars = bars.sort_index()
+    bars = bars[~bars.index.duplicated(keep='last')]
+    with data_lock:
+        bars = bars[bars.index > new_data.index[-1]]
+        if len(bars):
+            append_nse_bars(bars, rebuild=False)
+
+# A newly published model replaces every prediction: the engine loads the new
+# file, the validation span (streamed bars included) is predicted again and
+# the forecast metrics start over. The load and the prediction run without
+# data_lock, so callbacks are served meanwhile; bars streamed in during them
+# are covered by predicting again, with the model already loaded, before the
+# new frames are swapped in together.
+def reload_model():
+    global valid_data, forecast_metrics
+    ensure_predictions()
+    inference_engine.reset()
+    frame = new_data
+    predictions = predict_closing_prices(frame=frame)
+    with data_lock:
+        if new_data is not frame:
+            predictions = predict_closing_prices()
+        data = valid_data[['Close']].copy()
+        data['Predictions'] = predictions
+        metrics = ForecastMetrics()
+        metrics.update({'NSE': (data['Close'].to_numpy(), data['Predictions'].to_numpy())})
+        with prediction_lock:
+            valid_data = data
+            forecast_metrics = metrics
+        compute_statistics()
+        reload_data()
+        print(f"Loaded model {inference_engine.version or '(placeholder predictions)'}")
+
+# Interval and cursor for a page whose charts extend with streamed bars; the
+# cursor is the number of validation rows the page was built with
+def stream_components(prefix):
+    if not STREAM_FEED:
+        return []
+    return [
+        dcc.Interval(id=f'{prefix}-stream-interval', interval=STREAM_INTERVAL_MS),
+        dcc.Store(id=f'{prefix}-stream-cursor', data=len(valid_data))
+    ]
+
+# Training-span closes at the coarsest NSE level that still fills a chart
+def nse_training_series():
+    span = (train_data.index[0], train_data.index[-1])
+    level, store = nse_pyramid.select('NSE', min_points_for_width(), span)
+    lo, hi = store.window_bounds('NSE', *span)
+    frame = store.get('NSE').iloc[lo:hi]
+    return decimate(frame['Date'], frame['Close'])
+
+# Axis title naming the bar level when it is coarser than daily
+def date_axis_title(levels):
+    coarse = sorted(set(levels) - {'daily'})
+    return f"Date ({', '.join(coarse)} bars)" if coarse else 'Date'
 
 # Navigation component
 def create_navigation():
@@ -299,6 +546,10 @@ def create_navigation():
 
 # Dashboard Overview Page
 def create_overview_page():
+    ensure_predictions()
+    # Decimate long series for the browser; the full data stays server-side
+    train_x, train_y = nse_training_series()
+    valid_x, valid_y = decimate(valid_data.index, valid_data["Close"])
     return html.Div([
         html.Div([
             html.H1("Stock Price Prediction Dashboard", 
@@ -416,8 +667,8 @@ def create_overview_page():
                         figure={
                             "data": [
                                 go.Scatter(
-                                    x=train_data.index,
-                                    y=train_data["Close"],
+                                    x=train_x,
+                                    y=train_y,
                                     mode='lines',
                                     name='Training Data',
                                     line=dict(color='#00ff88', width=3),
@@ -425,8 +676,8 @@ def create_overview_page():
                                     fillcolor='rgba(0, 255, 136, 0.1)'
                                 ),
                                 go.Scatter(
-                                    x=valid_data.index,
-                                    y=valid_data["Close"],
+                                    x=valid_x,
+                                    y=valid_y,
                                     mode='lines',
                                     name='Validation Data',
                                     line=dict(color='#00cc6a', width=3),
@@ -445,7 +696,8 @@ def create_overview_page():
                                 margin=dict(l=50, r=50, t=30, b=50)
                             )
                         }
-                    )
+                    ),
+                    *stream_components('overview')
                 ], style={
                     'background': 'rgba(30, 30, 30, 0.9)',
                     'borderRadius': '12px',
@@ -474,6 +726,12 @@ def create_overview_page():
 
 # NSE-TATAGLOBAL Analysis Page
 def create_nse_analysis_page():
+    ensure_predictions()
+    nse_metrics = forecast_metrics.summary().loc['NSE']
+    # Decimate long series for the browser; the full data stays server-side
+    train_x, train_y = nse_training_series()
+    valid_x, valid_y = decimate(valid_data.index, valid_data["Close"])
+    pred_x, pred_y = decimate(valid_data.index, valid_data["Predictions"])
     return html.Div([
         html.Div([
             html.H1("NSE-TATAGLOBAL Stock Analysis", 
@@ -507,8 +765,8 @@ def create_nse_analysis_page():
                         figure={
                             "data": [
                                 go.Scatter(
-                                    x=train_data.index,
-                                    y=train_data["Close"],
+                                    x=train_x,
+                                    y=train_y,
                                     mode='lines',
                                     name='Training Data',
                                     line=dict(color='#00ff88', width=3),
@@ -516,8 +774,8 @@ def create_nse_analysis_page():
                                     fillcolor='rgba(0, 255, 136, 0.1)'
                                 ),
                                 go.Scatter(
-                                    x=valid_data.index,
-                                    y=valid_data["Close"],
+                                    x=valid_x,
+                                    y=valid_y,
                                     mode='lines',
                                     name='Validation Data',
                                     line=dict(color='#00cc6a', width=3),
@@ -564,15 +822,15 @@ def create_nse_analysis_page():
                         figure={
                             "data": [
                                 go.Scatter(
-                                    x=valid_data.index,
-                                    y=valid_data["Close"],
+                                    x=valid_x,
+                                    y=valid_y,
                                     mode='lines',
                                     name='Actual Values',
                                     line=dict(color='#00ff88', width=3)
                                 ),
                                 go.Scatter(
-                                    x=valid_data.index,
-                                    y=valid_data["Predictions"],
+                                    x=pred_x,
+                                    y=pred_y,
                                     mode='lines',
                                     name='Predicted Values',
                                     line=dict(color='#ff4757', width=3, dash='dash')
@@ -589,7 +847,8 @@ def create_nse_analysis_page():
                                 margin=dict(l=50, r=50, t=30, b=50)
                             )
                         }
-                    )
+                    ),
+                    *stream_components('nse')
                 ], style={
                     'background': 'rgba(30, 30, 30, 0.9)',
                     'borderRadius': '12px',
@@ -614,7 +873,7 @@ def create_nse_analysis_page():
                 html.Div([
                     html.Div([
                         html.Div([
-                            html.Div(f"{abs(price_change):.2f}", 
+                            html.Div(f"{nse_metrics['mae']:.2f}", 
                                     style={'fontSize': '2em', 'fontWeight': 'bold', 'color': '#00ff88', 'margin': '10px 0'}),
                             html.Div("Mean Absolute Error", 
                                     style={'color': '#cccccc', 'fontSize': '0.9em', 'textTransform': 'uppercase', 'letterSpacing': '1px'})
@@ -629,9 +888,24 @@ def create_nse_analysis_page():
                             'animation': 'slideInFromLeft 0.6s ease-out 0.5s both'
                         }),
                         html.Div([
-                            html.Div(f"{abs(price_change_pct):.2f}%", 
+                            html.Div(f"{nse_metrics['mape']:.2f}%", 
                                     style={'fontSize': '2em', 'fontWeight': 'bold', 'color': '#00ff88', 'margin': '10px 0'}),
-                            html.Div("Mean Percentage Error", 
+                            html.Div("Mean Absolute Percentage Error", 
+                                    style={'color': '#cccccc', 'fontSize': '0.9em', 'textTransform': 'uppercase', 'letterSpacing': '1px'})
+                        ], style={
+                            'background': 'rgba(30, 30, 30, 0.9)',
+                            'borderRadius': '10px',
+                            'padding': '20px',
+                            'textAlign': 'center',
+                            'border': '1px solid rgba(255, 255, 255, 0.1)',
+                            'backdropFilter': 'blur(15px)',
+                            'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.3)',
+                            'animation': 'slideInFromLeft 0.6s ease-out 0.55s both'
+                        }),
+                        html.Div([
+                            html.Div(f"{nse_metrics['rmse']:.2f}", 
+                                    style={'fontSize': '2em', 'fontWeight': 'bold', 'color': '#00ff88', 'margin': '10px 0'}),
+                            html.Div("Root Mean Squared Error", 
                                     style={'color': '#cccccc', 'fontSize': '0.9em', 'textTransform': 'uppercase', 'letterSpacing': '1px'})
                         ], style={
                             'background': 'rgba(30, 30, 30, 0.9)',
@@ -642,13 +916,37 @@ def create_nse_analysis_page():
                             'backdropFilter': 'blur(15px)',
                             'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.3)',
                             'animation': 'slideInFromRight 0.6s ease-out 0.6s both'
+                        }),
+                        html.Div([
+                            html.Div(f"{nse_metrics['directional_accuracy']:.1f}%", 
+                                    style={'fontSize': '2em', 'fontWeight': 'bold', 'color': '#00ff88', 'margin': '10px 0'}),
+                            html.Div("Directional Accuracy", 
+                                    style={'color': '#cccccc', 'fontSize': '0.9em', 'textTransform': 'uppercase', 'letterSpacing': '1px'})
+                        ], style={
+                            'background': 'rgba(30, 30, 30, 0.9)',
+                            'borderRadius': '10px',
+                            'padding': '20px',
+                            'textAlign': 'center',
+                            'border': '1px solid rgba(255, 255, 255, 0.1)',
+                            'backdropFilter': 'blur(15px)',
+                            'boxShadow': '0 8px 25px rgba(0, 0, 0, 0.3)',
+                            'animation': 'slideInFromRight 0.6s ease-out 0.65s both'
                         })
                     ], style={
                         'display': 'grid',
                         'gridTemplateColumns': 'repeat(auto-fit, minmax(200px, 1fr))',
                         'gap': '20px',
                         'margin': '20px 0'
-                    })
+                    }),
+
+                    # Model retraining (runs outside the web workers)
+                    html.Div([
+                        html.Button("Retrain Model", id="btn-retrain", n_clicks=0,
+                                   style={'margin': '5px', 'padding': '10px 20px', 'borderRadius': '8px', 'border': '1px solid rgba(255, 255, 255, 0.2)', 'background': 'rgba(40, 40, 40, 0.8)', 'color': '#00ff88', 'cursor': 'pointer', 'backdropFilter': 'blur(15px)', 'transition': 'all 0.3s ease', 'boxShadow': '0 4px 15px rgba(0, 0, 0, 0.2)'}),
+                        html.Div(describe(read_status()), id="retrain-status",
+                                style={'color': '#cccccc', 'fontSize': '0.95em', 'marginTop': '8px'}),
+                        dcc.Interval(id='retrain-interval', interval=2000)
+                    ], style={'textAlign': 'center', 'marginTop': '10px'})
                 ], style={
                     'background': 'rgba(25, 25, 25, 0.9)',
                     'borderRadius': '12px',
@@ -715,7 +1013,7 @@ def create_multi_stock_page():
                             }),
                     html.Div([
                         html.Button(stock_names[i], 
-                                  id=f"quick-select-{stock_symbols[i]}",
+                                  id=f"quick-select-{i}",
                                   n_clicks=0,
                                   style={
                                       'margin': '10px',
@@ -744,6 +1042,18 @@ def create_multi_stock_page():
                         'margin': '20px 0',
                         'padding': '10px'
                     }),
+                    # Indicators are drawn by the server callbacks only
+                    *([] if CLIENTSIDE_SYMBOL_SWITCHING else [
+                        dcc.Checklist(
+                            id='indicator-select',
+                            options=INDICATOR_OPTIONS,
+                            value=[],
+                            inline=True,
+                            style={'textAlign': 'center', 'margin': '10px 0'},
+                            labelStyle={'color': '#cccccc', 'margin': '0 12px', 'cursor': 'pointer'},
+                            inputStyle={'marginRight': '6px', 'accentColor': '#00ff88'}
+                        )
+                    ]),
                 ], style={
                     'background': 'rgba(25, 25, 25, 0.9)',
                     'borderRadius': '18px',
@@ -756,7 +1066,8 @@ def create_multi_stock_page():
                 }),
                 
                 html.Div([
-                    dcc.Graph(id='stock-comparison-chart')
+                    dcc.Graph(id='stock-comparison-chart'),
+                    dcc.Store(id='stock-comparison-selection', data=[default_symbol])
                 ], style={
                     'background': 'rgba(30, 30, 30, 0.9)',
                     'borderRadius': '12px',
@@ -792,7 +1103,7 @@ def create_multi_stock_page():
                             }),
                     html.Div([
                         html.Button(stock_names[i], 
-                                  id=f"quick-volume-{stock_symbols[i]}",
+                                  id=f"quick-volume-{i}",
                                   n_clicks=0,
                                   style={
                                       'margin': '10px',
@@ -833,8 +1144,12 @@ def create_multi_stock_page():
                 }),
                 
                 html.Div([
-                    dcc.Graph(id='volume-analysis-chart')
-                ], style={
+                    dcc.Graph(id='volume-analysis-chart'),
+                    dcc.Store(id='volume-analysis-selection', data=[default_symbol])
+                ] + ([
+                    # Preloaded per-symbol arrays for clientside symbol switching
+                    dcc.Store(id='multi-stock-data', data=build_clientside_payload())
+                ] if CLIENTSIDE_SYMBOL_SWITCHING else []), style={
                     'background': 'rgba(30, 30, 30, 0.9)',
                     'borderRadius': '12px',
                     'padding': '20px',
@@ -873,7 +1188,7 @@ def create_multi_stock_page():
                             'animation': 'slideInFromLeft 0.6s ease-out 1.1s both'
                         }),
                         html.Div([
-                            html.Div(f"250", 
+                            html.Div(f"{len(stock_store.frame) // max(len(stock_store), 1)}", 
                                     style={'fontSize': '2em', 'fontWeight': 'bold', 'color': '#00ff88', 'margin': '10px 0'}),
                             html.Div("Data Points per Stock", 
                                     style={'color': '#cccccc', 'fontSize': '0.9em', 'textTransform': 'uppercase', 'letterSpacing': '1px'})
@@ -940,6 +1255,58 @@ app.layout = html.Div([
     'padding': '20px',
     'minHeight': '100vh'
 })
+startup_profile.mark('layout construction')
+
+# Page builders keyed by the navigation button that shows them
+page_builders = {
+    'btn-overview': create_overview_page,
+    'btn-nse': create_nse_analysis_page,
+    'btn-multi': create_multi_stock_page,
+}
+
+def get_page(button_id):
+    key = (button_id, data_version)
+    page = page_cache.get(key)
+    if page is None:
+        with data_lock:
+            key = (button_id, data_version)
+            page = page_cache.get(key)
+            if page is None:
+                page_cache_stats['miss'] += 1
+                page = page_cache[key] = page_builders[button_id]()
+                return page
+    page_cache_stats['hit'] += 1
+    return page
+
+def build_pages():
+    for button_id in page_builders:
+        get_page(button_id)
+
+# Set once predictions and every page are built; /readyz answers 503 until
+# then so a load balancer only sends traffic to warm workers
+app_ready = threading.Event()
+
+# The predictions come from a spawned helper, so warming up does not load
+# the model, and TensorFlow with it, into the serving process; that only
+# happens once new predictions are needed (streamed bars, a new model)
+def warm_up():
+    ensure_predictions(in_subprocess=True)
+    build_pages()
+    app_ready.set()
+
+@server.route('/healthz')
+def healthz():
+    return {'status': 'ok', 'pid': os.getpid()}
+
+@server.route('/readyz')
+def readyz():
+    body = {
+        'ready': app_ready.is_set(),
+        'pid': os.getpid(),
+        'data_version': data_version,
+        'model_version': inference_engine.version
+    }
+    return body, 200 if body['ready'] else 503
 
 # Callback to update page content
 @app.callback(
@@ -951,45 +1318,27 @@ app.layout = html.Div([
 def update_page_content(overview_clicks, nse_clicks, multi_clicks):
     ctx = callback_context
     if not ctx.triggered:
-        return create_overview_page()
+        return get_page('btn-overview')
     
     button_id = ctx.triggered[0]["prop_id"].split(".")[0]
     
-    if button_id == "btn-overview":
-        return create_overview_page()
-    elif button_id == "btn-nse":
-        return create_nse_analysis_page()
-    elif button_id == "btn-multi":
-        return create_multi_stock_page()
+    if button_id in page_builders:
+        return get_page(button_id)
     
-    return create_overview_page()
+    return get_page('btn-overview')
 
-# Callback for stock comparison chart
-@app.callback(
-    Output('stock-comparison-chart', 'figure'),
-    [Input(f'quick-select-{symbol}', 'n_clicks') for symbol in stock_symbols]
-)
-def update_stock_comparison(*clicks):
-    ctx = callback_context
-    if not ctx.triggered:
-        # Default to showing FB stock data
-        selected_stocks = ['FB']
-    else:
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        symbol = button_id.replace('quick-select-', '')
-        # Show the clicked stock's data
-        selected_stocks = [symbol]
-    
-    if not selected_stocks:
-        return go.Figure()
-    
+# Figure builders for the multi-stock charts
+def build_stock_comparison_figure(selected_stocks, x_range=None, indicators=()):
     dropdown = dict(zip(stock_symbols, stock_names))
-    colors = ['#00ff88', '#00cc6a', '#ff4757', '#ff6b7a']
     
     traces = []
-    for i, stock in enumerate(selected_stocks):
-        stock_data = df[df["Stock"] == stock]
+    levels = []
+    for stock in selected_stocks:
+        # Coarsest bar level that still fills the chart over the visible range
+        level, store = stock_pyramid.select(stock, min_points_for_width(), x_range)
+        stock_data = store.get(stock)
         if not stock_data.empty:
+            levels.append(level)
             # Calculate if stock is increasing or decreasing
             first_price = stock_data["High"].iloc[0]
             last_price = stock_data["High"].iloc[-1]
@@ -998,74 +1347,104 @@ def update_stock_comparison(*clicks):
             # Use green for increasing, red for decreasing
             line_color = '#00ff88' if is_increasing else '#ff4757'
             
+            window = store.window_bounds(stock, *x_range) if x_range else None
+            high_x, high_y = decimate(stock_data["Date"], stock_data["High"], window=window)
+            low_x, low_y = decimate(stock_data["Date"], stock_data["Low"], window=window)
+            
             traces.append(go.Scatter(
-                x=stock_data["Date"],
-                y=stock_data["High"],
+                x=high_x,
+                y=high_y,
                 mode='lines',
                 opacity=0.8,
                 name=f'{dropdown[stock]} - High',
                 line=dict(color=line_color, width=2)
             ))
             traces.append(go.Scatter(
-                x=stock_data["Date"],
-                y=stock_data["Low"],
+                x=low_x,
+                y=low_y,
                 mode='lines',
                 opacity=0.6,
                 name=f'{dropdown[stock]} - Low',
                 line=dict(color=line_color, width=2, dash='dot')
             ))
+            traces.extend(indicator_traces(stock, dropdown[stock], indicators, x_range))
     
-    return {
+    xaxis = {"title": date_axis_title(levels), 'gridcolor': '#e0e0e0', 'color': '#333333', 'rangeslider': {'visible': True}, 'type': 'date'}
+    if x_range:
+        xaxis['range'] = list(x_range)
+    
+    layout = dict(
+        title='',
+        xaxis=xaxis,
+        yaxis={"title": 'Price (USD)', 'gridcolor': '#e0e0e0', 'color': '#333333'},
+        hovermode='x unified',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='#ffffff'),
+        margin=dict(l=50, r=50, t=30, b=50)
+    )
+    if set(indicators) & set(PANE_INDICATORS):
+        # RSI and ATR share a lower pane, each with its own scale
+        layout['yaxis']['domain'] = [0.32, 1]
+        layout['yaxis2'] = {'title': 'RSI', 'domain': [0, 0.24], 'range': [0, 100], 'gridcolor': '#e0e0e0', 'color': '#333333'}
+        layout['yaxis3'] = {'title': 'ATR', 'overlaying': 'y2', 'side': 'right', 'showgrid': False, 'color': '#333333'}
+    
+    return figure_payload({
         'data': traces,
-        'layout': go.Layout(
-            title='',
-            xaxis={"title": 'Date', 'gridcolor': '#e0e0e0', 'color': '#333333', 'rangeslider': {'visible': True}, 'type': 'date'},
-            yaxis={"title": 'Price (USD)', 'gridcolor': '#e0e0e0', 'color': '#333333'},
-            hovermode='x unified',
-            plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(color='#ffffff'),
-            margin=dict(l=50, r=50, t=30, b=50)
-        )
-    }
+        'layout': go.Layout(**layout)
+    })
 
-# Callback for volume analysis chart
-@app.callback(
-    Output('volume-analysis-chart', 'figure'),
-    [Input(f'quick-volume-{symbol}', 'n_clicks') for symbol in stock_symbols]
-)
-def update_volume_analysis(*clicks):
-    ctx = callback_context
-    if not ctx.triggered:
-        # Default to showing FB volume data
-        selected_stocks = ['FB']
-    else:
-        button_id = ctx.triggered[0]["prop_id"].split(".")[0]
-        symbol = button_id.replace('quick-volume-', '')
-        # Show the clicked stock's volume data
-        selected_stocks = [symbol]
-    
-    if not selected_stocks:
-        return go.Figure()
+# Overlay and lower-pane traces for one symbol's selected indicators, taken
+# from the daily series and decimated over the same window as the prices
+def indicator_traces(stock, label, indicators, x_range=None):
+    if not indicators or stock not in stock_store:
+        return []
+    dates = stock_store.get(stock)["Date"]
+    window = stock_store.window_bounds(stock, *x_range) if x_range else None
     
+    traces = []
+    for name in indicators:
+        values = indicator_engine.get(stock, name)
+        for column in values.columns:
+            x, y = decimate(dates, values[column].to_numpy(), window=window)
+            traces.append(go.Scatter(
+                x=x,
+                y=y,
+                mode='lines',
+                name=f'{label} {column.upper() if column == name else f"{name.title()} {column}"}',
+                yaxis=PANE_INDICATORS.get(name, 'y'),
+                line=dict(color=INDICATOR_COLORS[column], width=1.5, dash='dash' if column in ('upper', 'lower') else 'solid')
+            ))
+    return traces
+
+def build_volume_figure(selected_stocks, x_range=None):
     dropdown = dict(zip(stock_symbols, stock_names))
-    colors = ['#00ff88', '#00cc6a', '#ff4757', '#ff6b7a']
     
     traces = []
-    for i, stock in enumerate(selected_stocks):
-        stock_data = df[df["Stock"] == stock]
+    levels = []
+    for stock in selected_stocks:
+        level, store = stock_pyramid.select(stock, min_points_for_width(), x_range)
+        stock_data = store.get(stock)
         if not stock_data.empty:
+            levels.append(level)
+            # Coarse bars sum their volume; plot the daily average so the
+            # scale doesn't jump when the level changes
+            volume = stock_data["Volume"] / stock_data["Bars"] if 'Bars' in stock_data else stock_data["Volume"]
+            
             # Calculate if stock volume is increasing or decreasing
-            first_volume = stock_data["Volume"].iloc[0]
-            last_volume = stock_data["Volume"].iloc[-1]
+            first_volume = volume.iloc[0]
+            last_volume = volume.iloc[-1]
             is_increasing = last_volume > first_volume
             
             # Use green for increasing, red for decreasing
             line_color = '#00ff88' if is_increasing else '#ff4757'
             
+            window = store.window_bounds(stock, *x_range) if x_range else None
+            volume_x, volume_y = decimate(stock_data["Date"], volume, window=window)
+            
             traces.append(go.Scatter(
-                x=stock_data["Date"],
-                y=stock_data["Volume"],
+                x=volume_x,
+                y=volume_y,
                 mode='lines',
                 opacity=0.8,
                 name=f'{dropdown[stock]} Volume',
@@ -1074,21 +1453,286 @@ def update_volume_analysis(*clicks):
                 fillcolor=f'rgba({int(line_color[1:3], 16)}, {int(line_color[3:5], 16)}, {int(line_color[5:7], 16)}, 0.1)'
             ))
     
-    return {
+    xaxis = {"title": date_axis_title(levels), 'gridcolor': '#444444', 'color': '#ffffff', 'rangeslider': {'visible': True}, 'type': 'date'}
+    if x_range:
+        xaxis['range'] = list(x_range)
+    
+    return figure_payload({
         'data': traces,
         'layout': go.Layout(
             title='',
-            xaxis={"title": 'Date', 'gridcolor': '#444444', 'color': '#ffffff', 'rangeslider': {'visible': True}, 'type': 'date'},
-            yaxis={"title": 'Volume', 'gridcolor': '#444444', 'color': '#ffffff'},
+            xaxis=xaxis,
+            yaxis={"title": 'Volume' if set(levels) <= {'daily'} else 'Average Daily Volume', 'gridcolor': '#444444', 'color': '#ffffff'},
             hovermode='x unified',
             plot_bgcolor='rgba(0,0,0,0)',
             paper_bgcolor='rgba(0,0,0,0)',
             font=dict(color='#ffffff'),
             margin=dict(l=50, r=50, t=30, b=50)
         )
+    })
+
+def figure_payload(figure):
+    # Series go out as base64 typed arrays in binary mode
+    return encode_figure(figure) if binary_figures else figure
+
+def trend_color(series):
+    # Use green for increasing, red for decreasing
+    return '#00ff88' if series.iloc[-1] > series.iloc[0] else '#ff4757'
+
+# Compact per-symbol arrays and chart layouts for the clientside callbacks.
+# Each symbol shares one decimated x axis built from the union of the min/max
+# positions of its High, Low and Volume series.
+def build_clientside_payload():
+    dropdown = dict(zip(stock_symbols, stock_names))
+    max_points = max_points_for_width()
+    
+    symbols = {}
+    for stock in stock_symbols:
+        stock_data = stock_store.get(stock)
+        if stock_data.empty:
+            continue
+        idx = np.unique(np.concatenate([
+            minmax_indices(stock_data[column].to_numpy(), max_points)
+            for column in ('High', 'Low', 'Volume')
+        ]))
+        sampled = stock_data.iloc[idx]
+        dates = sampled["Date"]
+        unit = 'D' if (dates == dates.dt.normalize()).all() else 's'
+        volume_color = trend_color(stock_data["Volume"])
+        symbols[stock] = {
+            'name': dropdown[stock],
+            'x': np.datetime_as_string(dates.to_numpy(), unit=unit).tolist(),
+            'high': sampled["High"].round(4).tolist(),
+            'low': sampled["Low"].round(4).tolist(),
+            'volume': sampled["Volume"].tolist(),
+            'price_color': trend_color(stock_data["High"]),
+            'volume_color': volume_color,
+            'volume_fill': f'rgba({int(volume_color[1:3], 16)}, {int(volume_color[3:5], 16)}, {int(volume_color[5:7], 16)}, 0.1)'
+        }
+    
+    return {
+        'default_symbol': default_symbol,
+        'quick_symbols': quick_symbols,
+        'symbols': symbols,
+        'layouts': {
+            'stock-comparison-chart': build_stock_comparison_figure([])['layout'].to_plotly_json(),
+            'volume-analysis-chart': build_volume_figure([])['layout'].to_plotly_json()
+        }
     }
 
-if __name__ == '__main__':
+def cached_figure(chart_id, selected_stocks, build, variant=()):
+    key = (chart_id, tuple(selected_stocks), tuple(variant), data_version)
+    return figure_cache.get_or_build(key, lambda: build(selected_stocks))
+
+# Visible x window from a Graph's relayoutData: (start, end) when zoomed or
+# panned, None when reset to the full range, no_update for non-x changes
+def parse_x_range(relayout):
+    if not relayout:
+        return no_update
+    if relayout.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'][:2])
+    return no_update
+
+# Shared body of the multi-stock chart callbacks: a quick-select click swaps
+# the symbol and returns the cached full-range figure, a zoom re-resolves the
+# selected symbols for just the visible window
+def update_multi_stock_chart(chart_id, button_prefix, selected_stocks, build, variant=(), relayout=None):
+    ctx = callback_context
+    if not ctx.triggered:
+        return cached_figure(chart_id, selected_stocks, build, variant), selected_stocks
+    
+    prop_id = ctx.triggered[0]["prop_id"]
+    if prop_id == f'{chart_id}.relayoutData':
+        x_range = parse_x_range(ctx.triggered[0]["value"])
+        if x_range is no_update:
+            return no_update, no_update
+        if x_range is None:
+            return cached_figure(chart_id, selected_stocks, build, variant), no_update
+        return build(selected_stocks, x_range), no_update
+    
+    if not prop_id.startswith(button_prefix):
+        # Other inputs (the indicator toggles) redraw at the current zoom
+        x_range = parse_x_range(relayout)
+        if x_range is None or x_range is no_update:
+            return cached_figure(chart_id, selected_stocks, build, variant), no_update
+        return build(selected_stocks, x_range), no_update
+    
+    # Show the clicked stock's data
+    symbol = quick_symbols.get(prop_id.split(".")[0][len(button_prefix):])
+    if symbol is None:
+        return no_update, no_update
+    selected_stocks = [symbol]
+    return cached_figure(chart_id, selected_stocks, build, variant), selected_stocks
+
+# Callback for stock comparison chart
+def update_stock_comparison(*args):
+    # Default to showing the first stock's data
+    selected_stocks = args[-1] or [default_symbol]
+    indicators = tuple(args[-2] or ())
+    build = partial(build_stock_comparison_figure, indicators=indicators)
+    return update_multi_stock_chart('stock-comparison-chart', 'quick-select-', selected_stocks, build,
+                                    variant=indicators, relayout=args[-3])
+
+# Callback for volume analysis chart
+def update_volume_analysis(*args):
+    # Default to showing the first stock's volume data
+    selected_stocks = args[-1] or [default_symbol]
+    return update_multi_stock_chart('volume-analysis-chart', 'quick-volume-', selected_stocks, build_volume_figure)
+
+if CLIENTSIDE_SYMBOL_SWITCHING:
+    # Symbol switching runs in the browser against the preloaded store
+    app.clientside_callback(
+        ClientsideFunction(namespace='stocks', function_name='stockComparison'),
+        Output('stock-comparison-chart', 'figure'),
+        [Input(f'quick-select-{key}', 'n_clicks') for key in quick_symbols],
+        [State('multi-stock-data', 'data')]
+    )
+    app.clientside_callback(
+        ClientsideFunction(namespace='stocks', function_name='volumeAnalysis'),
+        Output('volume-analysis-chart', 'figure'),
+        [Input(f'quick-volume-{key}', 'n_clicks') for key in quick_symbols],
+        [State('multi-stock-data', 'data')]
+    )
+else:
+    app.callback(
+        [Output('stock-comparison-chart', 'figure'),
+         Output('stock-comparison-selection', 'data')],
+        [Input(f'quick-select-{key}', 'n_clicks') for key in quick_symbols] +
+        [Input('stock-comparison-chart', 'relayoutData'),
+         Input('indicator-select', 'value')],
+        [State('stock-comparison-selection', 'data')]
+    )(update_stock_comparison)
+    app.callback(
+        [Output('volume-analysis-chart', 'figure'),
+         Output('volume-analysis-selection', 'data')],
+        [Input(f'quick-volume-{key}', 'n_clicks') for key in quick_symbols] +
+        [Input('volume-analysis-chart', 'relayoutData')],
+        [State('volume-analysis-selection', 'data')]
+    )(update_volume_analysis)
+
+# Streaming: each tick sends only the rows past the client's cursor, and
+# maxPoints bounds every extended trace, so per-tick cost stays constant
+def stream_rows(cursor):
+    data = valid_data
+    if cursor is None or cursor >= len(data):
+        return None
+    return data.iloc[max(cursor, len(data) - STREAM_MAX_POINTS):], len(data)
+
+def stream_overview(n_intervals, cursor):
+    update = stream_rows(cursor)
+    if update is None:
+        return no_update, no_update
+    rows, cursor = update
+    return (dict(x=[rows.index], y=[rows['Close']]), [1], STREAM_MAX_POINTS), cursor
+
+def stream_nse(n_intervals, cursor):
+    update = stream_rows(cursor)
+    if update is None:
+        return no_update, no_update, no_update
+    rows, cursor = update
+    x = rows.index
+    return (
+        (dict(x=[x], y=[rows['Close']]), [1], STREAM_MAX_POINTS),
+        (dict(x=[x, x], y=[rows['Close'], rows['Predictions']]), [0, 1], STREAM_MAX_POINTS),
+        cursor
+    )
+
+if STREAM_FEED:
+    app.callback(
+        [Output('summary-chart', 'extendData'),
+         Output('overview-stream-cursor', 'data')],
+        [Input('overview-stream-interval', 'n_intervals')],
+        [State('overview-stream-cursor', 'data')]
+    )(stream_overview)
+    app.callback(
+        [Output('training-validation-chart', 'extendData'),
+         Output('prediction-accuracy-chart', 'extendData'),
+         Output('nse-stream-cursor', 'data')],
+        [Input('nse-stream-interval', 'n_intervals')],
+        [State('nse-stream-cursor', 'data')]
+    )(stream_nse)
+
+# Retraining runs in its own process (retraining.py); the button only starts
+# it and the interval reads its status file, so no request waits on training
+def update_retrain_status(n_clicks, n_intervals):
+    ctx = callback_context
+    if ctx.triggered and ctx.triggered[0]["prop_id"] == 'btn-retrain.n_clicks' and n_clicks:
+        status = start_retraining()
+    else:
+        status = read_status()
+    return describe(status)
+
+app.callback(
+    Output('retrain-status', 'children'),
+    [Input('btn-retrain', 'n_clicks'),
+     Input('retrain-interval', 'n_intervals')]
+)(update_retrain_status)
+
+startup_profile.mark('callback registration')
+
+# Threads every serving process runs. Threads do not survive a fork, so a
+# preloading server starts them in each worker after forking
+# (post_worker_init in gunicorn.conf.py); otherwise they start at import.
+# Only the first call starts them, so each process runs one set.
+background_started = False
+background_lock = threading.Lock()
+
+def start_background_work():
+    global background_started
+    with background_lock:
+        if background_started:
+            return
+        background_started = True
+    metrics_registry.rebase()
+    if METRICS and METRICS_DIR:
+        MetricsFlusher(metrics_registry).start()
+    # Build every page in the background so the first nav click is served
+    # from the cache without holding up worker boot
+    threading.Thread(target=warm_up, name='page-warmup', daemon=True).start()
+    if STREAM_FEED:
+        FeedRunner(open_feed(STREAM_FEED), on_stream_bars, STREAM_INTERVAL_MS / 1000).start()
+    if MODEL_WATCH_INTERVAL > 0:
+        ModelWatcher(inference_engine.model_changed, reload_model, MODEL_WATCH_INTERVAL).start()
+
+# Warm-up in the master of a preloading server, before any worker exists:
+# predictions, statistics and pages are built once and the forked workers
+# share them copy-on-write. The model runs in warm_up()'s spawned helper,
+# since the thread pools of TensorFlow and the TFLite interpreter do not
+# survive a fork; each worker loads it lazily if it ever needs new
+# predictions. gc.freeze() keeps the workers' garbage collector from writing
+# to (and so copying) every page of the shared objects.
+def preload():
+    warm_up()
+    gc.freeze()
+
+PROFILE_STARTUP = __name__ == '__main__' and '--profile-startup' in sys.argv
+
+if PROFILE_STARTUP:
+    # Run the deferred work in the foreground so each part is timed
+    boot_modules = startup_profile.heavy_modules_loaded()
+    ensure_predictions()
+    startup_profile.mark('predictions (model load)')
+    for button_id in page_builders:
+        get_page(button_id)
+        startup_profile.mark(f'page builder {button_id}')
+    startup_profile.report()
+    print(f"Heavy modules loaded at boot: {', '.join(boot_modules) or 'none'}; "
+          f"after first use: {', '.join(startup_profile.heavy_modules_loaded()) or 'none'}")
+elif __name__ == '__mp_main__':
+    # The spawned prediction helper re-imports this module as its main
+    # module under `python app.py`; it must not preload or warm up again
+    pass
+elif PRELOAD:
+    # Imported once in the master of a preloading server
+    preload()
+else:
+    start_background_work()
+
+if __name__ == '__main__' and not PROFILE_STARTUP:
     print("Starting Stock Price Prediction Dashboard...")
     print("Access the dashboard at: http://localhost:8080")
     app.run(debug=False, host='0.0.0.0', port=8080)
@@ -0,0 +1,71 @@
+// Clientside symbol switching for the multi-stock page, used when the app runs
+// with STOCKS_CLIENTSIDE_SWITCHING=1. The per-symbol arrays and chart layouts
+// come from the preloaded 'multi-stock-data' store.
+(function () {
+    // Quick buttons are keyed by position (quick-select-3); the store maps
+    // each key back to its ticker
+    function selectedSymbol(prefix, store) {
+        var ctx = window.dash_clientside.callback_context;
+        var triggered = ctx && ctx.triggered;
+        if (!triggered || !triggered.length || !triggered[0].prop_id || triggered[0].prop_id === '.') {
+            return store.default_symbol;
+        }
+        return store.quick_symbols[triggered[0].prop_id.split('.')[0].slice(prefix.length)];
+    }
+
+    function storeFrom(args) {
+        return args[args.length - 1];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        stocks: {
+            stockComparison: function () {
+                var store = storeFrom(arguments);
+                var symbol = selectedSymbol('quick-select-', store);
+                var series = store.symbols[symbol];
+                if (!series) {
+                    return window.dash_clientside.no_update;
+                }
+                return {
+                    data: [
+                        {
+                            type: 'scatter', mode: 'lines', opacity: 0.8,
+                            x: series.x, y: series.high,
+                            name: series.name + ' - High',
+                            line: {color: series.price_color, width: 2}
+                        },
+                        {
+                            type: 'scatter', mode: 'lines', opacity: 0.6,
+                            x: series.x, y: series.low,
+                            name: series.name + ' - Low',
+                            line: {color: series.price_color, width: 2, dash: 'dot'}
+                        }
+                    ],
+                    layout: store.layouts['stock-comparison-chart']
+                };
+            },
+
+            volumeAnalysis: function () {
+                var store = storeFrom(arguments);
+                var symbol = selectedSymbol('quick-volume-', store);
+                var series = store.symbols[symbol];
+                if (!series) {
+                    return window.dash_clientside.no_update;
+                }
+                return {
+                    data: [
+                        {
+                            type: 'scatter', mode: 'lines', opacity: 0.8,
+                            x: series.x, y: series.volume,
+                            name: series.name + ' Volume',
+                            line: {color: series.volume_color, width: 3},
+                            fill: 'tonexty',
+                            fillcolor: series.volume_fill
+                        }
+                    ],
+                    layout: store.layouts['volume-analysis-chart']
+                };
+            }
+        }
+    });
+})();
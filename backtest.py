@@ -0,0 +1,295 @@
+import argparse
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from batch_jobs import safe_name
+from config import INFERENCE_BACKEND, MODEL_PATH, NSE_DATA_PATH, RESULTS_DIR, STOCK_DATA_PATH, STORE_DIR, TFLITE_MODEL_PATH
+from data_loader import load_nse, load_stocks, source_token
+from data_store import mapped_symbol_store
+from inference import InferenceEngine, ModelUnavailable
+from metrics import COLUMNS, COUNT, bar_terms, metric_columns
+from windows import WINDOW
+
+# Walk-forward backtest of the saved LSTM and simple baselines over many
+# symbols. Each symbol's history is cut into folds: a training span (all bars
+# so far, or the last --train-size) followed by a test span of --test-size
+# bars, stepping forward by --step. The saved model is evaluated as is, with
+# the price scaling fitted on each fold's training span only, so no fold sees
+# its own test prices.
+#
+# Test windows are gathered from one strided view per symbol and the windows
+# of every uncached fold in a chunk of symbols go through a single predict
+# call. LSTM predictions are cached per fold, keyed by the model, the window
+# and the prices the fold depends on, so a rerun with other fold parameters
+# or more data only predicts folds it has not seen. Metrics are computed for
+# all folds at once from the per-bar terms in metrics.py.
+#
+#   results/backtest/folds.csv      one row per model, symbol and fold
+#   results/backtest/summary.csv    one row per model and symbol
+#   results/backtest/cache/         cached LSTM fold predictions
+#
+# Usage: python backtest.py --test-size 20 --models lstm naive sma
+
+MODELS = ('lstm', 'naive', 'sma')
+
+
+def plan_folds(length, min_train, test_size, step=None, train_size=None):
+    # [train_start, test_start, test_stop] of every complete fold; the
+    # training span expands from the first bar unless train_size is given
+    step = step or test_size
+    starts = np.arange(max(min_train, WINDOW), length - test_size + 1, step)
+    lows = np.zeros_like(starts) if train_size is None else np.maximum(starts - train_size, 0)
+    return np.column_stack((lows, starts, starts + test_size))
+
+
+def fold_scales(closes, folds):
+    # Min/max scaling of every fold's training span from one reduceat pass:
+    # with the (start, stop) pairs interleaved, every even slot reduces
+    # exactly one span
+    bounds = folds[:, :2].ravel()
+    low = np.fmin.reduceat(closes, bounds)[::2]
+    span = np.fmax.reduceat(closes, bounds)[::2] - low
+    span[span == 0] = 1.0
+    return low, span
+
+
+def fold_keys(closes, folds, window=WINDOW):
+    # A fold's predictions depend on the window and on the prices from its
+    # training start to its test end, and on nothing else
+    return [f'{lo}:{start}:{stop}:{window}:{hashlib.sha1(closes[lo:stop].tobytes()).hexdigest()[:16]}'
+            for lo, start, stop in folds]
+
+
+def test_bars(folds):
+    # Positions of the test bars, one row per fold
+    return folds[:, 1:2] + np.arange(folds[0, 2] - folds[0, 1])
+
+
+def lstm_windows(closes, folds, window=WINDOW):
+    # Scaled input windows for every test bar of the given folds, [bars, window, 1]
+    low, span = fold_scales(closes, folds)
+    views = sliding_window_view(closes, window)
+    windows = (views[test_bars(folds) - window] - low[:, None, None]) / span[:, None, None]
+    return windows.reshape(-1, window, 1), low, span
+
+
+def baseline_predictions(model, closes, bars, sma_window):
+    if model == 'naive':
+        # Tomorrow closes where today did
+        return closes[bars - 1]
+    if model == 'sma':
+        # Mean of the last sma_window closes
+        running = np.concatenate(([0.0], np.cumsum(closes, dtype=np.float64)))
+        return (running[bars] - running[bars - sma_window]) / sma_window
+    raise ValueError(f"Unknown model {model!r}")
+
+
+# Cached LSTM fold predictions of one model, one .npz per symbol holding the
+# fold keys and their predictions back to back
+class FoldCache:
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, symbol):
+        return os.path.join(self.directory, f'{safe_name(symbol)}.npz')
+
+    def load(self, symbol):
+        try:
+            with np.load(self._path(symbol)) as data:
+                keys, offsets, values = data['keys'], data['offsets'], data['values']
+        except (OSError, KeyError, ValueError):
+            return {}
+        return {str(key): values[offsets[i]:offsets[i + 1]] for i, key in enumerate(keys)}
+
+    def save(self, symbol, entries):
+        keys = list(entries)
+        offsets = np.concatenate(([0], np.cumsum([len(entries[key]) for key in keys]))).astype(np.int64)
+        values = np.concatenate([entries[key] for key in keys]) if keys else np.empty(0, dtype=np.float32)
+        path = self._path(symbol)
+        tmp_path = os.path.join(self.directory, f'.{os.getpid()}.{os.path.basename(path)}')
+        with open(tmp_path, 'wb') as handle:
+            np.savez(handle, keys=np.array(keys, dtype=str), offsets=offsets, values=values)
+        os.replace(tmp_path, path)
+
+
+def lstm_predictions(engine, cache, chunk):
+    # chunk is a list of (symbol, closes, folds). Cached folds are read back;
+    # the windows of all other folds in the chunk share one predict call.
+    # Returns symbol -> [folds, test_size] predictions and the number of
+    # folds that had to be predicted.
+    results = {}
+    pending = []
+    batches = []
+    for symbol, closes, folds in chunk:
+        keys = fold_keys(closes, folds)
+        cached = cache.load(symbol)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            windows, low, span = lstm_windows(closes, folds[missing])
+            batches.append(windows)
+            pending.append((symbol, keys, cached, missing, low, span))
+        results[symbol] = (keys, cached)
+
+    computed = 0
+    if batches:
+        outputs = np.split(engine.predict_windows(np.concatenate(batches)),
+                           np.cumsum([len(batch) for batch in batches])[:-1])
+        for (symbol, keys, cached, missing, low, span), output in zip(pending, outputs):
+            output = output.reshape(len(missing), -1) * span[:, None] + low[:, None]
+            for i, row in zip(missing, output):
+                cached[keys[i]] = row.astype(np.float32)
+            cache.save(symbol, cached)
+            computed += len(missing)
+
+    return {symbol: np.stack([cached[key] for key in keys]) for symbol, (keys, cached) in results.items()}, computed
+
+
+def fold_metrics(closes, folds, predicted):
+    # Per-fold running sums ([folds, COLUMNS]) for predictions shaped like
+    # test_bars(folds)
+    bars = test_bars(folds)
+    terms = bar_terms(closes[bars].ravel(), np.asarray(predicted, dtype=np.float64).ravel(),
+                      closes[bars - 1].ravel())
+    return terms.reshape(len(folds), -1, COLUMNS).sum(axis=1)
+
+
+def backtest(load_series, symbols, models=MODELS, min_train=250, test_size=20, step=None, train_size=None,
+             sma_window=20, engine=None, cache_dir=None, chunk_size=64):
+    # load_series(symbol) returns (dates, closes). Returns the per-fold and
+    # per-symbol frames and fold counts (all folds, LSTM folds predicted and
+    # LSTM folds read from the cache). Without an engine the served model is
+    # used, with its predictions cached under results/backtest/cache.
+    if min_train < WINDOW or (train_size is not None and train_size < WINDOW):
+        raise ValueError(f"Training spans need at least {WINDOW} bars")
+    if 'sma' in models and sma_window > min_train:
+        raise ValueError("--sma cannot be longer than --min-train")
+
+    cache = None
+    if 'lstm' in models:
+        if engine is None:
+            engine = InferenceEngine(TFLITE_MODEL_PATH if INFERENCE_BACKEND == 'tflite' else MODEL_PATH,
+                                     backend=INFERENCE_BACKEND)
+        if cache_dir is None:
+            cache_dir = os.path.join(RESULTS_DIR, 'backtest', 'cache')
+        try:
+            engine.load()
+            cache = FoldCache(os.path.join(cache_dir, f'lstm-{engine.backend_name}-{engine.version}'))
+        except ModelUnavailable as e:
+            print(f"Skipping the LSTM: {e}")
+            models = [model for model in models if model != 'lstm']
+
+    fold_rows = []
+    symbol_rows = []
+    stats = {'folds': 0, 'predicted': 0, 'cached': 0}
+    for begin in range(0, len(symbols), chunk_size):
+        chunk = []
+        for symbol in symbols[begin:begin + chunk_size]:
+            dates, closes = load_series(symbol)
+            closes = np.asarray(closes, dtype=np.float32)
+            folds = plan_folds(len(closes), min_train, test_size, step, train_size)
+            if len(folds):
+                chunk.append((symbol, dates, closes, folds))
+        if not chunk:
+            continue
+
+        predictions = {model: {} for model in models}
+        if cache is not None:
+            predictions['lstm'], computed = lstm_predictions(
+                engine, cache, [(symbol, closes, folds) for symbol, _, closes, folds in chunk])
+            stats['predicted'] += computed
+            stats['cached'] += sum(len(folds) for _, _, _, folds in chunk) - computed
+        for model in models:
+            if model != 'lstm':
+                for symbol, _, closes, folds in chunk:
+                    predictions[model][symbol] = baseline_predictions(model, closes, test_bars(folds), sma_window)
+
+        for symbol, dates, closes, folds in chunk:
+            stats['folds'] += len(folds)
+            dates = pd.DatetimeIndex(dates)
+            for model in models:
+                sums = fold_metrics(closes, folds, predictions[model][symbol])
+                columns = metric_columns(sums)
+                fold_rows.append(pd.DataFrame({
+                    'model': model,
+                    'symbol': symbol,
+                    'fold': np.arange(len(folds)),
+                    'train_start': dates[folds[:, 0]],
+                    'test_start': dates[folds[:, 1]],
+                    'test_end': dates[folds[:, 2] - 1],
+                    'count': sums[:, COUNT].astype(np.int64),
+                    **columns
+                }))
+                total = sums.sum(axis=0)
+                symbol_rows.append(dict({'model': model, 'symbol': symbol, 'folds': len(folds),
+                                         'count': int(total[COUNT])},
+                                        **{name: float(value) for name, value in metric_columns(total).items()}))
+
+    folds_frame = pd.concat(fold_rows, ignore_index=True) if fold_rows else pd.DataFrame()
+    return folds_frame, pd.DataFrame(symbol_rows), stats
+
+
+def open_source(data_path, nse):
+    # (symbols, load_series) for the NSE history or a multi-symbol file
+    if nse:
+        frame = load_nse(data_path or NSE_DATA_PATH)
+        return ['NSE'], lambda symbol: (frame['Date'].to_numpy(), frame['Close'].to_numpy())
+    data_path = data_path or STOCK_DATA_PATH
+    store = mapped_symbol_store(os.path.join(STORE_DIR, f'stocks-{source_token(data_path)}'),
+                                lambda: load_stocks(data_path))
+
+    def load_series(symbol):
+        frame = store.get(symbol)
+        return frame['Date'].to_numpy(), frame['Close'].to_numpy()
+    return store.symbols, load_series
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the LSTM and baselines")
+    parser.add_argument('--data', help="multi-symbol CSV, or the NSE file with --nse")
+    parser.add_argument('--nse', action='store_true', help="backtest the NSE-TATAGLOBAL history")
+    parser.add_argument('--symbols', nargs='*', help="only these symbols")
+    parser.add_argument('--models', nargs='*', choices=MODELS, default=list(MODELS))
+    parser.add_argument('--min-train', type=int, default=250, help="bars before the first test span")
+    parser.add_argument('--test-size', type=int, default=20, help="bars per test span")
+    parser.add_argument('--step', type=int, help="bars between fold starts (default: --test-size)")
+    parser.add_argument('--train-size', type=int, help="rolling training span (default: expanding)")
+    parser.add_argument('--sma', type=int, default=20, help="window of the moving-average baseline")
+    parser.add_argument('--backend', choices=['keras', 'tflite'], default=INFERENCE_BACKEND)
+    parser.add_argument('--model', help="model file (default: the served model for the backend)")
+    parser.add_argument('--chunk', type=int, default=64, help="symbols per predict call")
+    parser.add_argument('--results', default=RESULTS_DIR, help="results directory")
+    args = parser.parse_args(argv)
+
+    symbols, load_series = open_source(args.data, args.nse)
+    if args.symbols:
+        symbols = [symbol for symbol in symbols if symbol in set(args.symbols)]
+    model_path = args.model or (TFLITE_MODEL_PATH if args.backend == 'tflite' else MODEL_PATH)
+    output_dir = os.path.join(args.results, 'backtest')
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    try:
+        folds, summary, stats = backtest(
+            load_series, symbols, args.models, args.min_train, args.test_size, args.step, args.train_size,
+            args.sma, InferenceEngine(model_path, backend=args.backend), os.path.join(output_dir, 'cache'), args.chunk)
+    except ValueError as e:
+        print(f"Backtest failed: {e}")
+        return 1
+    folds.to_csv(os.path.join(output_dir, 'folds.csv'), index=False)
+    summary.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+
+    print(f"{len(symbols)} symbols, {stats['folds']} folds; LSTM folds: {stats['predicted']} predicted, "
+          f"{stats['cached']} cached; {time.perf_counter() - started:.1f}s")
+    if len(summary):
+        print(summary.groupby('model')[['mae', 'mape', 'rmse', 'directional_accuracy']].median().to_string())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,179 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from config import MODEL_PATH, RESULTS_DIR, STOCK_DATA_PATH, STORE_DIR
+from data_loader import load_stocks, source_token
+from data_store import mapped_symbol_store, open_symbol_store
+
+# Batch training and prediction over every symbol of a multi-symbol history
+# file. Symbols are sharded across a process pool; each worker maps the shared
+# column store, limits TensorFlow to a few threads, handles one symbol at a
+# time and writes its output to the results directory:
+#
+#   results/models/<symbol>.h5             trained model per symbol (train)
+#   results/predictions/<symbol>.parquet   validation-span predictions (predict)
+#   results/summary-<mode>.csv             one row per symbol
+#
+# Usage: python batch_jobs.py predict --workers 8 --tf-threads 1
+
+_worker = {}
+
+
+def safe_name(symbol):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(symbol))
+
+
+def model_file(results_dir, symbol):
+    return os.path.join(results_dir, 'models', f'{safe_name(symbol)}.h5')
+
+
+def predictions_file(results_dir, symbol):
+    return os.path.join(results_dir, 'predictions', f'{safe_name(symbol)}.parquet')
+
+
+def _init_worker(store_dir, tf_threads, options):
+    # Thread limits have to be in place before TensorFlow starts its pools
+    os.environ['OMP_NUM_THREADS'] = str(tf_threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(tf_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    _worker['store'] = open_symbol_store(store_dir)
+    _worker['options'] = options
+    _worker['engines'] = {}
+
+
+def _engine_for(path):
+    # One engine per model file per worker, so each model loads once
+    from inference import InferenceEngine
+
+    engines = _worker['engines']
+    if path not in engines:
+        engines[path] = InferenceEngine(path)
+    return engines[path]
+
+
+def _train_symbol(symbol, dates, closes, options):
+    from training import fit_lstm
+
+    model, loss = fit_lstm(closes, epochs=options['epochs'], batch_size=options['batch_size'])
+    path = model_file(options['results_dir'], symbol)
+    tmp_path = os.path.join(os.path.dirname(path), f'.{os.getpid()}.{os.path.basename(path)}')
+    model.save(tmp_path)
+    os.replace(tmp_path, path)
+    return {'loss': loss, 'output': path}
+
+
+def _predict_symbol(symbol, dates, closes, options):
+    from training import train_split
+
+    # Prefer the symbol's own model from a previous train run
+    path = model_file(options['results_dir'], symbol)
+    if not os.path.exists(path):
+        path = options['model_path']
+
+    start = train_split(len(closes))
+    predictions = _engine_for(path).predict({symbol: (dates, closes, start)})[symbol]
+    frame = pd.DataFrame({
+        'Date': dates[start:],
+        'Close': closes[start:],
+        'Prediction': predictions
+    })
+
+    output = predictions_file(options['results_dir'], symbol)
+    tmp_path = os.path.join(os.path.dirname(output), f'.{os.getpid()}.{os.path.basename(output)}')
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, output)
+    return {'mae': float(np.nanmean(np.abs(predictions - closes[start:]))), 'output': output}
+
+
+def _run_symbol(symbol):
+    options = _worker['options']
+    store = _worker['store']
+    if symbol not in store:
+        return {'symbol': symbol, 'rows': 0, 'status': 'error', 'error': 'unknown symbol', 'seconds': 0.0}
+    frame = store.get(symbol)
+    dates = frame['Date'].to_numpy()
+    closes = frame['Close'].to_numpy(dtype=np.float64)
+
+    started = time.perf_counter()
+    row = {'symbol': symbol, 'rows': len(frame), 'status': 'ok', 'error': ''}
+    try:
+        if options['mode'] == 'train':
+            row.update(_train_symbol(symbol, dates, closes, options))
+        else:
+            row.update(_predict_symbol(symbol, dates, closes, options))
+    except Exception as e:
+        # One bad symbol should not stop an overnight run
+        row.update(status='error', error=f'{type(e).__name__}: {e}')
+    row['seconds'] = round(time.perf_counter() - started, 3)
+    return row
+
+
+def run(mode, data_path=STOCK_DATA_PATH, results_dir=RESULTS_DIR, workers=None, tf_threads=1,
+        symbols=None, epochs=1, batch_size=1, model_path=MODEL_PATH):
+    # Build (or reuse) the shared column store once in the parent; workers map it
+    store_dir = os.path.join(STORE_DIR, f'stocks-{source_token(data_path)}')
+    store = mapped_symbol_store(store_dir, lambda: load_stocks(data_path))
+    symbols = list(symbols or store.symbols)
+    workers = workers or os.cpu_count() or 1
+
+    for subdir in ('models', 'predictions'):
+        os.makedirs(os.path.join(results_dir, subdir), exist_ok=True)
+    options = {
+        'mode': mode,
+        'results_dir': results_dir,
+        'model_path': model_path,
+        'epochs': epochs,
+        'batch_size': batch_size,
+    }
+
+    print(f"{mode}: {len(symbols)} symbols on {workers} workers x {tf_threads} TensorFlow threads")
+    rows = []
+    # TensorFlow is not fork-safe, so workers are spawned fresh
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(store_dir, tf_threads, options)) as pool:
+        futures = [pool.submit(_run_symbol, symbol) for symbol in symbols]
+        for done, future in enumerate(as_completed(futures), 1):
+            row = future.result()
+            rows.append(row)
+            print(f"[{done}/{len(symbols)}] {row['symbol']}: {row['status']} in {row['seconds']}s {row['error']}")
+
+    summary = pd.DataFrame(rows).sort_values('symbol')
+    summary.to_csv(os.path.join(results_dir, f'summary-{mode}.csv'), index=False)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train or predict the LSTM for every symbol in a history file")
+    parser.add_argument('mode', choices=['train', 'predict'])
+    parser.add_argument('--data', default=STOCK_DATA_PATH, help="multi-symbol CSV (Date,Open,High,Low,Close,Volume,Name)")
+    parser.add_argument('--results', default=RESULTS_DIR, help="results directory")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--tf-threads', type=int, default=1, help="TensorFlow threads per worker")
+    parser.add_argument('--symbols', nargs='*', help="only these symbols")
+    parser.add_argument('--epochs', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=1)
+    parser.add_argument('--model', default=MODEL_PATH, help="model used by predict when a symbol has no trained model")
+    args = parser.parse_args(argv)
+
+    summary = run(args.mode, args.data, args.results, args.workers, args.tf_threads, args.symbols,
+                  args.epochs, args.batch_size, args.model)
+    failed = (summary['status'] != 'ok').sum()
+    print(f"Finished: {len(summary) - failed} ok, {failed} failed")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import MODEL_PATH, NSE_DATA_PATH  # noqa: E402
+
+# Latency, throughput and memory of the Keras and TFLite inference backends on
+# the same windows. Each backend runs in a fresh interpreter so import cost and
+# resident memory are measured in isolation.
+#
+# Usage: python benchmarks/inference_backends.py --keras saved_model.h5 --tflite saved_model.tflite
+
+
+def build_windows(count):
+    from data_loader import read_nse_csv
+    from inference import scale_series
+    from windows import sliding_windows
+
+    scaled, _ = scale_series(read_nse_csv(NSE_DATA_PATH)['Close'].to_numpy())
+    windows = sliding_windows(scaled)
+    reps = -(-count // len(windows))
+    return np.ascontiguousarray(np.concatenate([windows] * reps)[:count], dtype=np.float32)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(backend, model_path, count, batch_size, calls, output_path):
+    windows = build_windows(count)
+    base_rss = peak_rss_mb()
+
+    started = time.perf_counter()
+    from inference import InferenceEngine
+    engine = InferenceEngine(model_path, batch_size=batch_size, backend=backend)
+    engine.load()
+    load_seconds = time.perf_counter() - started
+    loaded_rss = peak_rss_mb()
+
+    latencies = []
+    for i in range(calls):
+        window = windows[i % len(windows):i % len(windows) + 1]
+        tick = time.perf_counter()
+        engine.predict_windows(window)
+        latencies.append((time.perf_counter() - tick) * 1000)
+
+    tick = time.perf_counter()
+    output = engine.predict_windows(windows)
+    batch_seconds = time.perf_counter() - tick
+    np.save(output_path, output)
+
+    return {
+        'backend': backend,
+        'model': model_path,
+        'load_seconds': round(load_seconds, 3),
+        'tensorflow_imported': 'tensorflow' in sys.modules,
+        'single_p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'single_p95_ms': round(float(np.percentile(latencies, 95)), 3),
+        'windows': len(windows),
+        'batch_size': batch_size,
+        'throughput_windows_per_s': round(len(windows) / batch_seconds, 1),
+        'rss_before_load_mb': round(base_rss, 1),
+        'rss_peak_mb': round(peak_rss_mb(), 1),
+        'rss_load_growth_mb': round(loaded_rss - base_rss, 1),
+    }
+
+
+def run_isolated(backend, model_path, args, output_path):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', backend, '--model', model_path,
+               '--windows', str(args.windows), '--batch-size', str(args.batch_size),
+               '--calls', str(args.calls), '--output', output_path]
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='2')
+    result = subprocess.run(command, capture_output=True, text=True, env=env)
+    if result.returncode:
+        return {'backend': backend, 'model': model_path, 'error': result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Keras vs TFLite inference")
+    parser.add_argument('--keras', default=MODEL_PATH, help="Keras model (.h5)")
+    parser.add_argument('--tflite', default=os.path.splitext(MODEL_PATH)[0] + '.tflite', help="converted model (.tflite)")
+    parser.add_argument('--windows', type=int, default=10000, help="windows in the throughput run")
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--calls', type=int, default=200, help="single-window calls in the latency run")
+    parser.add_argument('--json', help="write results to this file")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--model', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(measure(args.worker, args.model, args.windows, args.batch_size, args.calls, args.output)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        outputs = {}
+        for backend, model_path in (('keras', args.keras), ('tflite', args.tflite)):
+            output_path = os.path.join(tmp, f'{backend}.npy')
+            results.append(run_isolated(backend, model_path, args, output_path))
+            if os.path.exists(output_path):
+                outputs[backend] = np.load(output_path)
+
+    report = {'results': results}
+    if len(outputs) == 2:
+        report['max_abs_diff'] = float(np.max(np.abs(outputs['keras'] - outputs['tflite'])))
+
+    for row in results:
+        if 'error' in row:
+            print(f"{row['backend']:>7}: failed: {' '.join(row['error'])}")
+            continue
+        print(f"{row['backend']:>7}: load {row['load_seconds']}s, "
+              f"single p50 {row['single_p50_ms']}ms p95 {row['single_p95_ms']}ms, "
+              f"{row['throughput_windows_per_s']} windows/s, "
+              f"peak RSS {row['rss_peak_mb']}MB (+{row['rss_load_growth_mb']}MB on load), "
+              f"TensorFlow imported: {row['tensorflow_imported']}")
+    if 'max_abs_diff' in report:
+        print(f"max |keras - tflite| = {report['max_abs_diff']:.2e} (scaled units)")
+
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
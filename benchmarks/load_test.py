@@ -0,0 +1,407 @@
+import argparse
+import gzip
+import http.client
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import RESULTS_DIR  # noqa: E402
+
+# Load test of the Dash callback endpoint with concurrent simulated analysts.
+# Each session behaves like a browser tab: it fetches the layout and the
+# callback list, fires the initial callbacks of every component it renders,
+# polls the dcc.Intervals of the page it is on, and between think times clicks
+# the navigation buttons and the quick-select and quick-volume buttons, each
+# as a raw POST to /_dash-update-component carrying the current input values.
+# Symbols are picked with a Zipf-like popularity, so caches see a realistic
+# mix of repeated and new requests. Latency percentiles and throughput are
+# reported per callback (by first output id) at each concurrency level.
+#
+# Usage:
+#   python benchmarks/load_test.py                                 # starts python app.py
+#   python benchmarks/load_test.py --server gunicorn --concurrency 1 8 32 --duration 60
+#   python benchmarks/load_test.py --url http://dashboard-host:8080 --think-time 2
+
+NAV_BUTTONS = ('btn-overview', 'btn-nse', 'btn-multi')
+QUICK_PREFIXES = ('quick-select-', 'quick-volume-')
+
+# Relative weights of the session actions (quick clicks only on the
+# Multi-Stock page)
+ACTION_WEIGHTS = {'nav': 1.0, 'quick-select-': 2.0, 'quick-volume-': 1.0}
+
+UPDATE_PATH = '/_dash-update-component'
+
+
+def parse_callbacks(dependencies):
+    # Server-side callbacks from /_dash-dependencies; clientside ones run in
+    # the browser and never reach the endpoint
+    callbacks = []
+    for dependency in dependencies:
+        if dependency.get('clientside_function'):
+            continue
+        output = dependency['output']
+        outputs = [dict(zip(('id', 'property'), part.rsplit('.', 1))) for part in output.strip('.').split('...')]
+        callbacks.append({
+            'output': output,
+            'outputs': outputs,
+            'multi': output.startswith('..'),
+            'inputs': dependency['inputs'],
+            'state': dependency.get('state', []),
+            'initial': not dependency.get('prevent_initial_call'),
+            'label': outputs[0]['id'],
+        })
+    return callbacks
+
+
+def walk_components(node):
+    # Every component with an id in a layout fragment, as (id, type, props)
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, dict) and 'props' in node:
+            props = node['props']
+            if isinstance(props.get('id'), str):
+                yield props['id'], node.get('type'), props
+            stack.append(props.get('children'))
+
+
+class Recorder:
+    # Collects (label, latency, status, bytes) of requests that end inside
+    # the measured window
+    def __init__(self, measure_from):
+        self.measure_from = measure_from
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, label, latency, status, size):
+        ended = time.monotonic()
+        if ended < self.measure_from:
+            return
+        with self._lock:
+            self.samples.append((label, latency, status, size))
+
+
+class Session:
+    # One simulated analyst with its own keep-alive connection and the client
+    # state a browser would keep: rendered component ids, the prop values
+    # callbacks read, and running intervals
+    def __init__(self, base_url, callbacks, recorder, rng, think_time, zipf, timeout):
+        parts = urllib.parse.urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip('/')
+        self.callbacks = callbacks
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+        self.zipf = zipf
+        self.timeout = timeout
+        self.connection = None
+        self.present = set()
+        self.values = {}
+        self.owned = {}
+        self.intervals = {}
+        self.watched = {(item['id'], item['property'])
+                        for callback in callbacks for item in callback['inputs'] + callback['state']}
+
+    def request(self, method, path, body=None):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        headers = {'Accept-Encoding': 'gzip'}
+        if body is not None:
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            self.connection = None
+            raise
+        size = len(data)
+        if response.getheader('Content-Encoding') == 'gzip':
+            data = gzip.decompress(data)
+        return response.status, data, size
+
+    def render(self, owner, fragment):
+        # Replace the components a container rendered before, then fire the
+        # initial callbacks of the new ones
+        for component_id in self.owned.pop(owner, ()):
+            self.present.discard(component_id)
+            self.intervals.pop(component_id, None)
+        added = set()
+        for component_id, component_type, props in walk_components(fragment):
+            added.add(component_id)
+            for prop, value in props.items():
+                if (component_id, prop) in self.watched:
+                    self.values[(component_id, prop)] = value
+            if component_type == 'Interval' and not props.get('disabled'):
+                period = props.get('interval', 1000) / 1000
+                self.intervals[component_id] = [period, time.monotonic() + period]
+        self.owned[owner] = added
+        self.present |= added
+        for callback in self.callbacks:
+            ids = {item['id'] for item in callback['inputs']} | {item['id'] for item in callback['outputs']}
+            if (callback['initial'] and ids & added
+                    and all(item['id'] in self.present for item in callback['inputs'])):
+                self.fire(callback, [])
+
+    def fire(self, callback, triggered):
+        def spec(items):
+            return [{'id': item['id'], 'property': item['property'],
+                     'value': self.values.get((item['id'], item['property']))} for item in items]
+        body = json.dumps({
+            'output': callback['output'],
+            'outputs': callback['outputs'] if callback['multi'] else callback['outputs'][0],
+            'inputs': spec(callback['inputs']),
+            'state': spec(callback['state']),
+            'changedPropIds': triggered,
+        })
+        started = time.monotonic()
+        try:
+            status, data, size = self.request('POST', UPDATE_PATH, body)
+        except (OSError, http.client.HTTPException):
+            self.recorder.record(callback['label'], time.monotonic() - started, 0, 0)
+            return
+        self.recorder.record(callback['label'], time.monotonic() - started, status, size)
+        if status != 200:
+            return
+        changed = []
+        for component_id, props in json.loads(data).get('response', {}).items():
+            for prop, value in props.items():
+                if prop == 'children' and isinstance(value, (dict, list)):
+                    self.render(component_id, value)
+                if (component_id, prop) in self.watched:
+                    self.values[(component_id, prop)] = value
+                    changed.append(f'{component_id}.{prop}')
+        # Callbacks that take an updated prop as input run next, as in Dash
+        for callback in self.callbacks:
+            inputs = {f"{item['id']}.{item['property']}" for item in callback['inputs']}
+            if inputs & set(changed):
+                self.fire(callback, sorted(inputs & set(changed)))
+
+    def click(self, component_id, prop='n_clicks'):
+        self.values[(component_id, prop)] = (self.values.get((component_id, prop)) or 0) + 1
+        triggered = f'{component_id}.{prop}'
+        for callback in self.callbacks:
+            if any(f"{item['id']}.{item['property']}" == triggered for item in callback['inputs']):
+                self.fire(callback, [triggered])
+
+    def tick_intervals(self):
+        now = time.monotonic()
+        for component_id, timer in list(self.intervals.items()):
+            if component_id in self.intervals and now >= timer[1]:
+                timer[1] = now + timer[0]
+                self.click(component_id, 'n_intervals')
+
+    def pick_symbol(self, prefix):
+        # Zipf-like popularity over the buttons in page order
+        buttons = sorted(component_id for component_id in self.present if component_id.startswith(prefix))
+        weights = 1.0 / np.arange(1, len(buttons) + 1) ** self.zipf
+        return self.rng.choices(buttons, weights=weights)[0]
+
+    def step(self):
+        actions = ['nav'] + [prefix for prefix in QUICK_PREFIXES
+                             if any(component_id.startswith(prefix) for component_id in self.present)]
+        action = self.rng.choices(actions, weights=[ACTION_WEIGHTS[action] for action in actions])[0]
+        if action == 'nav':
+            self.click(self.rng.choice(NAV_BUTTONS))
+        else:
+            self.click(self.pick_symbol(action))
+
+    def run(self, stop_at):
+        try:
+            status, data, _ = self.request('GET', '/_dash-layout')
+        except (OSError, http.client.HTTPException):
+            self.recorder.record('_dash-layout', 0.0, 0, 0)
+            return
+        self.render(None, json.loads(data))
+        while time.monotonic() < stop_at:
+            pause = self.rng.expovariate(1 / self.think_time) if self.think_time else 0
+            time.sleep(max(0.0, min(pause, stop_at - time.monotonic())))
+            if time.monotonic() >= stop_at:
+                break
+            self.tick_intervals()
+            self.step()
+        if self.connection is not None:
+            self.connection.close()
+
+
+def fetch_json(base_url, path, timeout=30):
+    parts = urllib.parse.urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+    try:
+        connection.request('GET', parts.path.rstrip('/') + path)
+        response = connection.getresponse()
+        return response.status, json.loads(response.read() or b'null')
+    finally:
+        connection.close()
+
+
+def wait_ready(base_url, process, timeout):
+    # Poll /readyz until predictions and pages are built
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            status, _ = fetch_json(base_url, '/readyz', timeout=5)
+            if status == 200:
+                return
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"server not ready after {timeout}s")
+
+
+def start_server(kind, port, log_path):
+    # python app.py always listens on 8080; gunicorn binds to the port given
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='2')
+    if kind == 'app':
+        command = [sys.executable, 'app.py']
+        port = 8080
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py']
+        env['STOCKS_BIND'] = f'127.0.0.1:{port}'
+    with open(log_path, 'ab') as log:
+        process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdin=subprocess.DEVNULL, stdout=log,
+                                   stderr=subprocess.STDOUT, start_new_session=True)
+    return process, f'http://127.0.0.1:{port}'
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(30)
+    except ProcessLookupError:
+        return
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+def summarize(samples, seconds):
+    # Per-callback and overall latency percentiles (ms) and throughput
+    by_label = {}
+    for label, latency, status, size in samples:
+        by_label.setdefault(label, []).append((latency, status, size))
+    by_label['all'] = [(latency, status, size) for _, latency, status, size in samples]
+    rows = {}
+    for label, entries in by_label.items():
+        ok = np.array([latency for latency, status, _ in entries if status == 200]) * 1000
+        sizes = [size for _, status, size in entries if status == 200]
+        rows[label] = {
+            'requests': len(entries),
+            'errors': sum(status != 200 for _, status, _ in entries),
+            'throughput_rps': round(len(entries) / seconds, 2),
+            'p50_ms': round(float(np.percentile(ok, 50)), 1) if len(ok) else None,
+            'p95_ms': round(float(np.percentile(ok, 95)), 1) if len(ok) else None,
+            'p99_ms': round(float(np.percentile(ok, 99)), 1) if len(ok) else None,
+            'max_ms': round(float(ok.max()), 1) if len(ok) else None,
+            'mean_bytes': int(np.mean(sizes)) if sizes else 0,
+        }
+    return rows
+
+
+def run_level(base_url, callbacks, concurrency, args):
+    # Sessions start spread over the ramp-up; only requests that finish
+    # after the warm-up count
+    started = time.monotonic()
+    measure_from = started + args.ramp_up + args.warmup
+    stop_at = measure_from + args.duration
+    recorder = Recorder(measure_from)
+    threads = []
+    for index in range(concurrency):
+        rng = random.Random(args.seed * 100003 + index)
+        session = Session(base_url, callbacks, recorder, rng, args.think_time, args.zipf, args.timeout)
+        delay = args.ramp_up * index / concurrency
+
+        def run(session=session, delay=delay):
+            time.sleep(delay)
+            session.run(stop_at)
+        thread = threading.Thread(target=run, name=f'session-{index}', daemon=True)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join(args.duration + args.ramp_up + args.warmup + args.timeout)
+    measured = max(min(time.monotonic(), stop_at) - measure_from, 1e-9)
+    return {'concurrency': concurrency, 'seconds': round(measured, 1),
+            'callbacks': summarize(recorder.samples, measured)}
+
+
+def print_level(level):
+    print(f"\n{level['concurrency']} concurrent sessions, {level['seconds']}s measured")
+    print(f"  {'callback':<28} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'KB':>8}")
+    for label, row in sorted(level['callbacks'].items(), key=lambda item: (item[0] == 'all', item[0])):
+        p50, p95, p99 = (f'{row[key]:.1f}' if row[key] is not None else '-' for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f"  {label:<28} {row['requests']:>8} {row['errors']:>6} {row['throughput_rps']:>8.2f} {p50:>8} "
+              f"{p95:>8} {p99:>8} {row['mean_bytes'] / 1024:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the Dash callback endpoint with concurrent sessions")
+    parser.add_argument('--url', help="server to test (default: start one locally)")
+    parser.add_argument('--server', choices=('app', 'gunicorn'), default='app',
+                        help="local server to start: python app.py or gunicorn -c gunicorn.conf.py")
+    parser.add_argument('--port', type=int, default=8090, help="port of a local gunicorn server")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16], help="sessions per level")
+    parser.add_argument('--duration', type=float, default=30, help="measured seconds per level")
+    parser.add_argument('--warmup', type=float, default=5, help="seconds after the ramp-up that are not measured")
+    parser.add_argument('--ramp-up', type=float, default=5, help="seconds over which sessions start")
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help="mean seconds between a session's actions (0: back to back)")
+    parser.add_argument('--zipf', type=float, default=1.1, help="skew of symbol popularity (0: uniform)")
+    parser.add_argument('--timeout', type=float, default=60, help="request timeout in seconds")
+    parser.add_argument('--ready-timeout', type=float, default=600, help="seconds to wait for a local server")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="results file (default: results/load-tests/<time>.json)")
+    args = parser.parse_args(argv)
+
+    os.makedirs(os.path.join(RESULTS_DIR, 'load-tests'), exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    process = None
+    base_url = args.url
+    if not base_url:
+        log_path = os.path.join(RESULTS_DIR, 'load-tests', f'{stamp}-server.log')
+        process, base_url = start_server(args.server, args.port, log_path)
+        print(f"Started {args.server} server (log: {log_path})")
+    try:
+        wait_ready(base_url, process, args.ready_timeout)
+        status, dependencies = fetch_json(base_url, '/_dash-dependencies')
+        if status != 200:
+            raise RuntimeError(f"/_dash-dependencies answered {status}")
+        callbacks = parse_callbacks(dependencies)
+        print(f"Testing {base_url}: {', '.join(callback['label'] for callback in callbacks)}")
+        report = {'url': base_url, 'server': None if args.url else args.server, 'created': stamp,
+                  'think_time': args.think_time, 'zipf': args.zipf, 'seed': args.seed, 'levels': []}
+        for concurrency in args.concurrency:
+            level = run_level(base_url, callbacks, concurrency, args)
+            report['levels'].append(level)
+            print_level(level)
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    output = args.output or os.path.join(RESULTS_DIR, 'load-tests', f'{stamp}.json')
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nWrote {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,368 @@
+import argparse
+import gzip
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import MODEL_PATH, RESULTS_DIR  # noqa: E402
+
+# Benchmarks of the dashboard at scale on seeded synthetic data: data ingest,
+# symbol lookup, every page builder, every figure builder and figure callback,
+# figure serialization size, and window construction plus predict on the LSTM.
+# Each (symbols, bars) case runs in a fresh interpreter that imports app.py
+# against generated data files, so module-level setup is measured too and
+# cases do not share caches. Results are written as JSON per commit; compare
+# two runs with --compare.
+#
+# Usage:
+#   python benchmarks/suite.py                                  # quick grid
+#   python benchmarks/suite.py --symbols 4 500 5000 --bars 250 25000
+#   python benchmarks/suite.py --compare results/benchmarks/a.json results/benchmarks/b.json
+
+DATA_DIR = os.path.join(BASE_DIR, '.cache', 'bench-data')
+
+# Daily bars that fit in the dates pandas can represent (1678 to 2262)
+MAX_BARS = 200000
+
+PRESETS = {
+    'quick': ([4, 50], [250, 2500]),
+    'full': ([4, 50, 500, 5000], [250, 2500, 25000, MAX_BARS]),
+}
+
+
+def price_paths(rng, count, bars, start=100.0):
+    # Geometric random walks, one row per series
+    returns = rng.normal(0.0003, 0.015, size=(count, bars))
+    return start * np.exp(np.cumsum(returns, axis=1))
+
+
+def bar_dates(bars):
+    # Consecutive days ending in 2024, or starting in 1678 when that would
+    # reach back past what pandas can represent
+    if bars > 126000:
+        return pd.date_range('1678-01-01', periods=bars, freq='D')
+    return pd.date_range(end='2024-12-31', periods=bars, freq='D')
+
+
+def synthetic_stocks(path, symbols, bars, seed):
+    # stock_data.xls layout: Date,Open,High,Low,Close,Volume,Name
+    rng = np.random.default_rng([seed, symbols, bars])
+    close = price_paths(rng, symbols, bars)
+    open_ = close * (1 + rng.normal(0, 0.005, close.shape))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, close.shape)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, close.shape)))
+    volume = rng.integers(100000, 5000000, close.shape)
+    frame = pd.DataFrame({
+        'Date': np.tile(bar_dates(bars).strftime('%m/%d/%Y'), symbols),
+        'Open': open_.ravel().round(2),
+        'High': high.ravel().round(2),
+        'Low': low.ravel().round(2),
+        'Close': close.ravel().round(2),
+        'Volume': volume.ravel(),
+        'Name': np.repeat([f'S{i:04d}' for i in range(symbols)], bars),
+    })
+    frame.to_csv(path, index=False)
+
+
+def synthetic_nse(path, bars, seed):
+    # NSE-TATA.xls layout, newest bar first like the bundled file
+    rng = np.random.default_rng([seed, bars])
+    close = price_paths(rng, 1, bars)[0]
+    frame = pd.DataFrame({
+        'Date': bar_dates(bars).strftime('%Y-%m-%d'),
+        'Open': close.round(2),
+        'High': (close * 1.01).round(2),
+        'Low': (close * 0.99).round(2),
+        'Last': close.round(2),
+        'Close': close.round(2),
+        'Total Trade Quantity': rng.integers(100000, 5000000, bars),
+        'Turnover (Lacs)': (close * 10).round(2),
+    })
+    frame.iloc[::-1].to_csv(path, index=False)
+
+
+def data_files(symbols, bars, seed):
+    # Generated once per (symbols, bars, seed) and reused across runs
+    os.makedirs(DATA_DIR, exist_ok=True)
+    stocks = os.path.join(DATA_DIR, f'stocks-{symbols}x{bars}-s{seed}.csv')
+    nse = os.path.join(DATA_DIR, f'nse-{bars}-s{seed}.csv')
+    if not os.path.exists(stocks):
+        synthetic_stocks(stocks + '.tmp', symbols, bars, seed)
+        os.replace(stocks + '.tmp', stocks)
+    if not os.path.exists(nse):
+        synthetic_nse(nse + '.tmp', bars, seed)
+        os.replace(nse + '.tmp', nse)
+    return stocks, nse
+
+
+def timed(fn, reps):
+    # Median and best wall time of reps calls, and the last result
+    times = []
+    result = None
+    for _ in range(reps):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return {'median_s': float(np.median(times)), 'min_s': float(np.min(times)), 'reps': reps}, result
+
+
+def payload_size(value):
+    from plotly.utils import PlotlyJSONEncoder
+
+    text = json.dumps(value, cls=PlotlyJSONEncoder).encode()
+    return {'json_bytes': len(text), 'gzip_bytes': len(gzip.compress(text, 6))}
+
+
+def callback_body(app, output, triggered, values):
+    # The request the browser sends for one callback
+    callback = app.callback_map[output]
+
+    def spec(items):
+        return [{'id': item['id'], 'property': item['property'],
+                 'value': values.get(f"{item['id']}.{item['property']}")} for item in items]
+    outputs = [dict(zip(('id', 'property'), part.rsplit('.', 1))) for part in output.strip('.').split('...')]
+    return {'output': output, 'outputs': outputs if output.startswith('..') else outputs[0],
+            'inputs': spec(callback['inputs']), 'state': spec(callback.get('state', [])),
+            'changedPropIds': [triggered]}
+
+
+def run_case(args):
+    # Runs inside the worker interpreter; app.py reads its configuration from
+    # the environment set by the parent
+    results = {'timings': {}, 'sizes': {}}
+    timings = results['timings']
+    sizes = results['sizes']
+
+    from data_loader import read_nse_csv, read_stock_csv
+    from data_store import SymbolStore, mapped_symbol_store
+    timings['ingest.parse_stock_csv'], frame = timed(lambda: read_stock_csv(os.environ['STOCKS_STOCK_DATA']), 1)
+    timings['ingest.parse_nse_csv'], _ = timed(lambda: read_nse_csv(os.environ['STOCKS_NSE_DATA']), 1)
+    timings['ingest.symbol_store'], _ = timed(lambda: SymbolStore(frame), 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        timings['ingest.mapped_store_build'], _ = timed(
+            lambda: mapped_symbol_store(os.path.join(tmp, 'store'), lambda: frame), 1)
+        timings['ingest.mapped_store_open'], _ = timed(
+            lambda: mapped_symbol_store(os.path.join(tmp, 'store'), lambda: frame), 3)
+    del frame
+
+    # Module-level setup, including the warm-up of a preloading server
+    timings['startup.import_app'], app = timed(lambda: importlib.import_module('app'), 1)
+    import startup_profile
+    for name, elapsed in startup_profile.phases:
+        timings[f'startup.{name}'] = {'median_s': elapsed, 'min_s': elapsed, 'reps': 1}
+
+    # Symbol lookup: the store's slices and a boolean-mask scan of df
+    rng = np.random.default_rng(args.seed)
+    symbols = app.stock_store.symbols
+    picks = [symbols[i] for i in rng.integers(0, len(symbols), 1000)]
+    dates = app.df['Date'].to_numpy()
+    start, end = dates[len(dates) // 4], dates[len(dates) // 2]
+    lookups = iter(picks * 10)
+    timings['lookup.store_get'], _ = timed(lambda: app.stock_store.get(next(lookups)), 1000)
+    timings['lookup.store_window'], _ = timed(lambda: app.stock_store.window(next(lookups), start, end), 1000)
+    timings['lookup.df_mask'], _ = timed(lambda: app.df[app.df['Stock'] == next(lookups)], 20)
+
+    for button_id, builder in app.page_builders.items():
+        name = builder.__name__
+        timings[f'page.{name}'], page = timed(builder, args.reps)
+        sizes[f'page.{name}'] = payload_size(page)
+
+    symbol = app.default_symbol
+    all_indicators = tuple(option['value'] for option in app.INDICATOR_OPTIONS)
+    figures = {
+        'build_stock_comparison_figure': lambda: app.build_stock_comparison_figure([symbol]),
+        'build_stock_comparison_figure+indicators':
+            lambda: app.build_stock_comparison_figure([symbol], indicators=all_indicators),
+        'build_volume_figure': lambda: app.build_volume_figure([symbol]),
+    }
+    for name, build in figures.items():
+        timings[f'figure.{name}'], figure = timed(build, args.reps)
+        sizes[f'figure.{name}'] = payload_size(figure)
+        timings[f'serialize.{name}'], _ = timed(lambda: payload_size(figure), args.reps)
+
+    # Callbacks through the Dash endpoint, as the browser calls them: cold
+    # builds the figure or page, warm is served from the caches
+    client = app.server.test_client()
+    last = len(symbols) - 1
+    callbacks = {
+        'update_page_content': ('page-content.children', 'btn-multi.n_clicks', {'btn-multi.n_clicks': 1}),
+        'update_stock_comparison': ('..stock-comparison-chart.figure...stock-comparison-selection.data..',
+                                    f'quick-select-{last}.n_clicks', {f'quick-select-{last}.n_clicks': 1}),
+        'update_volume_analysis': ('..volume-analysis-chart.figure...volume-analysis-selection.data..',
+                                   f'quick-volume-{last}.n_clicks', {f'quick-volume-{last}.n_clicks': 1}),
+    }
+    for name, (output, triggered, values) in callbacks.items():
+        if output not in app.app.callback_map:
+            continue
+        body = callback_body(app.app, output, triggered, values)
+
+        def call(clear):
+            if clear:
+                app.figure_cache.clear()
+                app.page_cache.clear()
+            response = client.post('/_dash-update-component', json=body)
+            assert response.status_code == 200, response.status_code
+            return response.get_data()
+        timings[f'callback.{name}.cold'], data = timed(lambda: call(True), args.reps)
+        timings[f'callback.{name}.warm'], data = timed(lambda: call(False), args.reps)
+        sizes[f'callback.{name}'] = {'json_bytes': len(data), 'gzip_bytes': len(gzip.compress(data, 6))}
+
+    # Window construction and predict over the NSE validation span
+    from inference import InferenceEngine, ModelUnavailable, scale_series
+    from windows import sliding_windows
+    closes = app.new_data['Close'].to_numpy()
+    timings['inference.windows'], windows = timed(lambda: sliding_windows(scale_series(closes)[0]), args.reps)
+    results['inference'] = {'windows': int(len(closes) - app.train_size), 'model': args.model}
+    engine = InferenceEngine(args.model)
+    try:
+        timings['inference.load'], _ = timed(engine.load, 1)
+        request = {'NSE': (app.new_data.index, closes, app.train_size)}
+
+        def predict():
+            engine.clear_cache()
+            return engine.predict(request)
+        timings['inference.predict'], _ = timed(predict, args.reps)
+    except ModelUnavailable as e:
+        results['inference']['error'] = str(e)
+    return results
+
+
+def run_isolated(symbols, bars, args):
+    stocks, nse = data_files(symbols, bars, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, STOCKS_STOCK_DATA=stocks, STOCKS_NSE_DATA=nse, STOCKS_STORE_DIR=os.path.join(tmp, 'store'),
+                   STOCKS_MODEL_PATH=args.model, STOCKS_DEMO_DATA='0', STOCKS_PRELOAD='1', STOCKS_COMPRESS='0',
+                   STOCKS_MODEL_WATCH_INTERVAL='0', STOCKS_METRICS_DIR='', STOCKS_STREAM_FEED='',
+                   TF_CPP_MIN_LOG_LEVEL='2')
+        command = [sys.executable, os.path.abspath(__file__), '--worker', '--model', args.model,
+                   '--reps', str(args.reps), '--seed', str(args.seed)]
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=BASE_DIR)
+    case = {'symbols': symbols, 'bars': bars, 'rows': symbols * bars}
+    if result.returncode:
+        case['error'] = result.stderr.strip().splitlines()[-1:]
+        return case
+    case.update(json.loads(result.stdout.strip().splitlines()[-1]))
+    return case
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=BASE_DIR, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, cwd=BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def flatten(case):
+    # metric name -> value for one case, for comparing runs
+    values = {f'{name} s': timing['median_s'] for name, timing in case.get('timings', {}).items()}
+    values.update({f'{name} bytes': size['json_bytes'] for name, size in case.get('sizes', {}).items()})
+    return values
+
+
+def compare(base_path, head_path, threshold):
+    with open(base_path) as handle:
+        base = json.load(handle)
+    with open(head_path) as handle:
+        head = json.load(handle)
+    base_cases = {(case['symbols'], case['bars']): case for case in base['cases']}
+    print(f"{base['revision']} -> {head['revision']}")
+    regressions = 0
+    for case in head['cases']:
+        key = (case['symbols'], case['bars'])
+        if key not in base_cases:
+            continue
+        print(f"\n{key[0]} symbols x {key[1]} bars")
+        before = flatten(base_cases[key])
+        for name, after in flatten(case).items():
+            if name not in before or not before[name]:
+                continue
+            ratio = after / before[name]
+            flag = ''
+            if ratio > 1 + threshold:
+                flag = '  <-- slower' if name.endswith(' s') else '  <-- larger'
+                regressions += 1
+            print(f"  {name:<60} {before[name]:>12.4g} {after:>12.4g} {ratio:>7.2f}x{flag}")
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingest, callbacks, page builders and inference at scale")
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--symbols', type=int, nargs='*', help="symbol counts (overrides the preset)")
+    parser.add_argument('--bars', type=int, nargs='*', help="bars per symbol (overrides the preset)")
+    parser.add_argument('--max-rows', type=int, default=5000000, help="skip cases with more symbols x bars")
+    parser.add_argument('--reps', type=int, default=3, help="repetitions of each timed step")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--model', default=MODEL_PATH, help="model used for the predict timings")
+    parser.add_argument('--output', help="results file (default: results/benchmarks/<commit>.json)")
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'HEAD'), help="compare two results files")
+    parser.add_argument('--threshold', type=float, default=0.25, help="ratio over which --compare flags a change")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+    if args.worker:
+        print(json.dumps(run_case(args)))
+        return 0
+
+    symbol_counts, bar_counts = PRESETS[args.preset]
+    symbol_counts = args.symbols or symbol_counts
+    bar_counts = args.bars or bar_counts
+    if max(bar_counts) > MAX_BARS:
+        parser.error(f"--bars is limited to {MAX_BARS} daily bars")
+
+    revision = git_revision()
+    report = {
+        'revision': revision,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cpus': os.cpu_count(),
+        'model': args.model,
+        'cases': [],
+    }
+    for symbols in symbol_counts:
+        for bars in bar_counts:
+            if symbols * bars > args.max_rows:
+                print(f"{symbols} symbols x {bars} bars: skipped (over --max-rows)")
+                continue
+            started = time.perf_counter()
+            case = run_isolated(symbols, bars, args)
+            report['cases'].append(case)
+            if 'error' in case:
+                print(f"{symbols} symbols x {bars} bars: failed: {' '.join(case['error'])}")
+                continue
+            timings = case['timings']
+            pages = ', '.join(f"{name[5:]} {timing['median_s'] * 1000:.0f}ms"
+                              for name, timing in timings.items() if name.startswith('page.'))
+            print(f"{symbols} symbols x {bars} bars ({time.perf_counter() - started:.0f}s): "
+                  f"import {timings['startup.import_app']['median_s']:.2f}s, "
+                  f"lookup {timings['lookup.store_get']['median_s'] * 1e6:.0f}us, {pages}")
+
+    output = args.output or os.path.join(RESULTS_DIR, 'benchmarks', f'{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"Wrote {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,66 @@
+import os
+
+
+def env_flag(name, default=False):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Ship compact per-symbol arrays to the browser once and switch symbols on the
+# multi-stock page with clientside callbacks instead of server round-trips
+CLIENTSIDE_SYMBOL_SWITCHING = env_flag('STOCKS_CLIENTSIDE_SWITCHING')
+
+# Set by gunicorn.conf.py: the app module is imported once in the master,
+# which builds predictions and pages before forking the workers
+PRELOAD = env_flag('STOCKS_PRELOAD')
+
+# Market data files (CSV text, despite the .xls extension) and a switch to use
+# generated demo data instead
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+NSE_DATA_PATH = os.environ.get('STOCKS_NSE_DATA', os.path.join(BASE_DIR, 'NSE-TATA.xls'))
+STOCK_DATA_PATH = os.environ.get('STOCKS_STOCK_DATA', os.path.join(BASE_DIR, 'stock_data.xls'))
+DEMO_DATA = env_flag('STOCKS_DEMO_DATA')
+
+# Send multi-stock figure series as base64 typed arrays instead of JSON text
+# (needs plotly.js 2.28+, i.e. Dash 2.15 or later), and compress responses of
+# at least COMPRESS_MIN_SIZE bytes with brotli or gzip
+BINARY_FIGURES = env_flag('STOCKS_BINARY_FIGURES')
+COMPRESS_RESPONSES = env_flag('STOCKS_COMPRESS', True)
+COMPRESS_MIN_SIZE = int(os.environ.get('STOCKS_COMPRESS_MIN_SIZE', '1024'))
+
+# Per-callback latency, payload and error metrics on /metrics (Prometheus
+# text format). With several worker processes, each one writes its metrics to
+# METRICS_DIR and a scrape adds them up; gunicorn.conf.py sets a directory.
+METRICS = env_flag('STOCKS_METRICS', True)
+METRICS_DIR = os.environ.get('STOCKS_METRICS_DIR', '')
+
+# Memory-mapped column store shared by all worker processes on a host; it is
+# rebuilt under a new directory whenever a source file changes
+MMAP_STORE = env_flag('STOCKS_MMAP_STORE', True)
+STORE_DIR = os.environ.get('STOCKS_STORE_DIR', os.path.join(BASE_DIR, '.cache', 'store'))
+
+# Keras model serving the prediction charts, and the backend that runs it:
+# 'keras', or 'tflite' to serve its conversion (tflite_backend.py) without
+# importing TensorFlow in the web workers
+MODEL_PATH = os.environ.get('STOCKS_MODEL_PATH', os.path.join(BASE_DIR, 'saved_model.h5'))
+INFERENCE_BACKEND = os.environ.get('STOCKS_INFERENCE_BACKEND', 'keras')
+TFLITE_MODEL_PATH = os.environ.get('STOCKS_TFLITE_MODEL_PATH', os.path.splitext(MODEL_PATH)[0] + '.tflite')
+
+# Live NSE bars (a feeds.py spec: file:<path> or tcp:<host>:<port>). Open
+# charts poll for new points every STREAM_INTERVAL_MS and keep at most
+# STREAM_MAX_POINTS per trace
+STREAM_FEED = os.environ.get('STOCKS_STREAM_FEED', '')
+STREAM_INTERVAL_MS = int(os.environ.get('STOCKS_STREAM_INTERVAL_MS', '1000'))
+STREAM_MAX_POINTS = int(os.environ.get('STOCKS_STREAM_MAX_POINTS', '5000'))
+
+# Output of the batch training/prediction jobs
+RESULTS_DIR = os.environ.get('STOCKS_RESULTS_DIR', os.path.join(BASE_DIR, 'results'))
+
+# Retraining from the dashboard or `python retraining.py`: training settings
+# of a run, and how often (seconds) each web worker checks the model file for
+# a newly published version (0 turns the check off)
+RETRAIN_EPOCHS = int(os.environ.get('STOCKS_RETRAIN_EPOCHS', '1'))
+RETRAIN_BATCH_SIZE = int(os.environ.get('STOCKS_RETRAIN_BATCH_SIZE', '1'))
+MODEL_WATCH_INTERVAL = float(os.environ.get('STOCKS_MODEL_WATCH_INTERVAL', '30'))
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(BASE_DIR, '.cache')
+
+# Bump whenever the parsers below change so stale caches are rebuilt
+CACHE_FORMAT = 1
+
+# The bundled .xls files are CSV text. Columns are parsed with explicit dtypes
+# and dates with an explicit format so pandas never has to infer either.
+NSE_DTYPES = {
+    'Date': str,
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Last': 'float64',
+    'Close': 'float64',
+    'Total Trade Quantity': 'float64',
+    'Turnover (Lacs)': 'float64',
+}
+NSE_DATE_FORMAT = '%Y-%m-%d'
+
+STOCK_DTYPES = {
+    'Date': str,
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'float64',
+    'Name': str,
+}
+STOCK_DATE_FORMAT = '%m/%d/%Y'
+
+
+def read_nse_csv(path):
+    frame = pd.read_csv(path, usecols=list(NSE_DTYPES), dtype=NSE_DTYPES)
+    frame['Date'] = pd.to_datetime(frame['Date'], format=NSE_DATE_FORMAT)
+    frame = frame.rename(columns={'Total Trade Quantity': 'Volume', 'Turnover (Lacs)': 'Turnover'})
+    return frame.sort_values('Date', kind='mergesort').reset_index(drop=True)
+
+
+def read_stock_csv(path):
+    # Long format, one row per symbol per bar, sorted by symbol then date
+    frame = pd.read_csv(path, usecols=list(STOCK_DTYPES), dtype=STOCK_DTYPES)
+    frame['Date'] = pd.to_datetime(frame['Date'], format=STOCK_DATE_FORMAT)
+    frame = frame.rename(columns={'Name': 'Stock'})
+    frame = frame[['Stock', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']]
+    return frame.sort_values(['Stock', 'Date'], kind='mergesort').reset_index(drop=True)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _key(text, length=16):
+    return hashlib.sha1(text.encode()).hexdigest()[:length]
+
+
+def _cache_path(path, cache_dir):
+    # Keyed by the full path, so same-named files in different directories
+    # get their own copies
+    return os.path.join(cache_dir, f'{os.path.basename(path)}-{_key(os.path.abspath(path))}.parquet')
+
+
+def _read_cache_meta(cache_path):
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    raw = metadata.get(b'stocks_source')
+    return json.loads(raw) if raw else None
+
+
+def _write_cache(cache_path, frame, meta):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'stocks_source'] = json.dumps(meta).encode()
+    table = table.replace_schema_metadata(metadata)
+    # Write next to the target and swap in place so readers never see a partial file
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, cache_path)
+
+
+def cached_load(path, reader, cache_dir=CACHE_DIR):
+    # Parse `path` with `reader` once and keep a Parquet copy next to it. The
+    # copy is reused while the source's mtime and size are unchanged, or, when
+    # only the mtime moved, while its content hash still matches.
+    if pq is None:
+        return reader(path)
+
+    stat = os.stat(path)
+    cache_path = _cache_path(path, cache_dir)
+    meta = _read_cache_meta(cache_path)
+    digest = None
+    if meta is not None and meta.get('format') == CACHE_FORMAT and meta.get('size') == stat.st_size:
+        if meta.get('mtime_ns') == stat.st_mtime_ns:
+            return pq.read_table(cache_path).to_pandas()
+        digest = file_digest(path)
+        if meta.get('sha1') == digest:
+            return pq.read_table(cache_path).to_pandas()
+
+    frame = reader(path)
+    try:
+        _write_cache(cache_path, frame, {
+            'format': CACHE_FORMAT,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha1': digest or file_digest(path),
+        })
+    except OSError as e:
+        print(f"Could not write data cache {cache_path}: {e}")
+    return frame
+
+
+def source_token(path):
+    # Short name for one revision of a source file, for naming derived
+    # stores: '<file>-<revision>', so every revision of a file shares the
+    # part before the last '-'
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return f'{_key(path, 8)}-{_key(f"{stat.st_mtime_ns}:{stat.st_size}:{CACHE_FORMAT}")}'
+
+
+def load_nse(path, cache_dir=CACHE_DIR):
+    return cached_load(path, read_nse_csv, cache_dir)
+
+
+def load_stocks(path, cache_dir=CACHE_DIR):
+    return cached_load(path, read_stock_csv, cache_dir)
+
+
+# Generated data for running the dashboard without the bundled files. The
+# generators are seeded so every worker process produces the same frames.
+DEMO_SEED = 42
+# Bump when the generators below change, so stores built from their old
+# output are not reused
+DEMO_VERSION = 1
+
+
+def demo_token(*args):
+    # source_token() for generated data: every generator version, seed and
+    # argument set is its own revision of 'demo'
+    return f'demo-{_key(repr((DEMO_VERSION, DEMO_SEED) + args))}'
+
+
+def demo_nse_frame(periods=1000, seed=DEMO_SEED):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=periods, freq='D')
+    close_prices = rng.standard_normal(periods).cumsum() + 100
+    return pd.DataFrame({
+        'Date': dates,
+        'Close': close_prices
+    })
+
+
+def demo_stock_frame(symbols, periods=250, seed=DEMO_SEED):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=periods, freq='D')
+    frames = []
+    for i, symbol in enumerate(symbols):
+        frames.append(pd.DataFrame({
+            'Stock': [symbol] * periods,
+            'Date': dates,
+            'High': rng.standard_normal(periods).cumsum() + 100 + i*20,
+            'Low': rng.standard_normal(periods).cumsum() + 90 + i*20,
+            'Volume': rng.integers(1000000, 10000000, periods)
+        }))
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,170 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+
+
+# Symbol-indexed view over a long-format frame (one row per symbol per bar).
+# The frame is sorted by symbol and date once at load time and the start/stop
+# offsets of every symbol are recorded, so a lookup is a positional slice that
+# only touches that symbol's rows instead of scanning the whole frame.
+class SymbolStore:
+    def __init__(self, frame, key='Stock', date_col='Date'):
+        sort_cols = [key, date_col] if date_col in frame.columns else [key]
+        self.key = key
+        self.date_col = date_col
+        self.frame = frame.sort_values(sort_cols, kind='mergesort').reset_index(drop=True)
+
+        keys = self.frame[key].to_numpy()
+        if len(keys):
+            boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+            starts = np.concatenate(([0], boundaries))
+            stops = np.concatenate((boundaries, [len(keys)]))
+        else:
+            starts = stops = np.array([], dtype=np.int64)
+
+        self.offsets = {
+            keys[start]: (int(start), int(stop))
+            for start, stop in zip(starts, stops)
+        }
+
+    @classmethod
+    def from_sorted(cls, frame, offsets, key='Stock', date_col='Date'):
+        # Wrap a frame that is already sorted by symbol and date, with known offsets
+        store = cls.__new__(cls)
+        store.key = key
+        store.date_col = date_col
+        store.frame = frame
+        store.offsets = dict(offsets)
+        return store
+
+    @property
+    def symbols(self):
+        return list(self.offsets)
+
+    def __contains__(self, symbol):
+        return symbol in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, symbol):
+        start, stop = self.offsets.get(symbol, (0, 0))
+        return self.frame.iloc[start:stop]
+
+    def window_bounds(self, symbol, start=None, end=None):
+        # Positions of [start, end] within the symbol's slice, found by binary
+        # search on its sorted dates
+        frame = self.get(symbol)
+        dates = frame[self.date_col].to_numpy()
+        lo = 0 if start is None else int(np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), 'left'))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), 'right'))
+        return lo, max(lo, hi)
+
+    def window(self, symbol, start=None, end=None):
+        lo, hi = self.window_bounds(symbol, start, end)
+        return self.get(symbol).iloc[lo:hi]
+
+    def rows(self, symbol):
+        start, stop = self.offsets.get(symbol, (0, 0))
+        return stop - start
+
+
+# Read-only column store shared between processes. Every column is saved as
+# its own .npy file and mapped with mmap_mode='r', so all Dash workers on a
+# host share one copy of the data through the page cache instead of each
+# holding a private frame. String columns are saved as int32 category codes.
+def write_columns(frame, directory, extra=None):
+    # Build the store in a private directory and rename it into place, so a
+    # reader never sees a half-written store. If another process published
+    # the same store first, keep theirs.
+    parent = os.path.dirname(os.path.abspath(directory))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = f'{directory}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for name in frame.columns:
+        values = frame[name]
+        column = {'name': name, 'file': f'col{len(columns)}.npy'}
+        if values.dtype == object or pd.api.types.is_string_dtype(values) or isinstance(values.dtype, pd.CategoricalDtype):
+            codes, categories = pd.factorize(values, sort=True)
+            column['categories'] = [str(category) for category in categories]
+            array = codes.astype(np.int32)
+        else:
+            array = values.to_numpy()
+        np.save(os.path.join(tmp_dir, column['file']), array, allow_pickle=False)
+        columns.append(column)
+
+    manifest = dict(extra or {})
+    manifest['columns'] = columns
+    manifest['rows'] = len(frame)
+    with open(os.path.join(tmp_dir, MANIFEST), 'w') as handle:
+        json.dump(manifest, handle)
+
+    try:
+        os.rename(tmp_dir, directory)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.exists(os.path.join(directory, MANIFEST)):
+            raise
+
+
+def map_columns(directory):
+    with open(os.path.join(directory, MANIFEST)) as handle:
+        manifest = json.load(handle)
+
+    data = {}
+    for column in manifest['columns']:
+        array = np.load(os.path.join(directory, column['file']), mmap_mode='r', allow_pickle=False)
+        if 'categories' in column:
+            array = pd.Categorical.from_codes(array, column['categories'], validate=False)
+        data[column['name']] = array
+    # copy=False keeps every column backed by its mapped file
+    return pd.DataFrame(data, copy=False), manifest
+
+
+def has_columns(directory):
+    return os.path.exists(os.path.join(directory, MANIFEST))
+
+
+def prune_revisions(directory):
+    # Delete the other revisions of a store: its siblings named the same up
+    # to the last '-' (see data_loader.source_token). Processes still mapping
+    # an old revision keep reading it until they exit; in-progress builds
+    # (.tmp) are left alone.
+    parent, name = os.path.split(os.path.abspath(directory))
+    prefix = name.rsplit('-', 1)[0] + '-'
+    for entry in os.listdir(parent):
+        if entry.startswith(prefix) and entry != name and not entry.endswith('.tmp'):
+            shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def mapped_frame(directory, build):
+    # Map the frame stored in `directory`, writing it from build() first if
+    # no process has published it yet
+    if not has_columns(directory):
+        write_columns(build(), directory)
+        prune_revisions(directory)
+    return map_columns(directory)[0]
+
+
+def mapped_symbol_store(directory, build, key='Stock', date_col='Date'):
+    if not has_columns(directory):
+        store = SymbolStore(build(), key, date_col)
+        offsets = [[str(symbol), start, stop] for symbol, (start, stop) in store.offsets.items()]
+        write_columns(store.frame, directory, {'key': key, 'date_col': date_col, 'offsets': offsets})
+        prune_revisions(directory)
+
+    return open_symbol_store(directory)
+
+
+def open_symbol_store(directory):
+    frame, manifest = map_columns(directory)
+    offsets = {symbol: (start, stop) for symbol, start, stop in manifest['offsets']}
+    return SymbolStore.from_sorted(frame, offsets, manifest['key'], manifest['date_col'])
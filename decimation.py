@@ -0,0 +1,80 @@
+import numpy as np
+
+
+# Charts are at most this wide (see the maxWidth of the main layout) and two
+# points per pixel column are enough to keep every visible peak and trough
+DEFAULT_CHART_WIDTH = 1400
+POINTS_PER_PIXEL = 2
+
+
+# A line still reads as continuous with one point every two pixel columns;
+# coarser bar levels are used as long as they provide at least that many
+PIXELS_PER_POINT = 2
+
+
+def max_points_for_width(width=DEFAULT_CHART_WIDTH, points_per_pixel=POINTS_PER_PIXEL):
+    return max(int(width * points_per_pixel), 4)
+
+
+def min_points_for_width(width=DEFAULT_CHART_WIDTH, pixels_per_point=PIXELS_PER_POINT):
+    return max(int(width / pixels_per_point), 2)
+
+
+def minmax_indices(y, max_points):
+    # Split the series into (max_points - 2) // 2 buckets whose sizes differ
+    # by at most one, and keep the positions of each bucket's minimum and
+    # maximum, plus both end points, so spikes survive decimation where plain
+    # striding would drop them. Never returns more than max_points positions.
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 4:
+        return np.unique(np.linspace(0, n - 1, max(max_points, 1)).astype(np.int64))
+
+    buckets = (max_points - 2) // 2
+    # np.array_split layout: the first n % buckets buckets hold one more
+    # point, so each group is a plain reshape of the series
+    size, larger = divmod(n, buckets)
+    split = larger * (size + 1)
+    idx = [[0, n - 1]]
+    for offset, count, width in ((0, larger, size + 1), (split, buckets - larger, size)):
+        if count:
+            blocks = y[offset:offset + count * width].reshape(count, width)
+            starts = offset + np.arange(count) * width
+            idx += [starts + np.argmin(blocks, axis=1), starts + np.argmax(blocks, axis=1)]
+    return np.unique(np.concatenate(idx))
+
+
+def window_indices(y, window, max_points):
+    # Full point budget inside the visible [lo, hi) window and a coarse outline
+    # on either side, so a zoomed chart keeps its detail while the range
+    # slider still shows the whole history
+    y = np.asarray(y, dtype=float)
+    lo, hi = window
+    context = max(max_points // 8, 2)
+    return np.concatenate((
+        minmax_indices(y[:lo], context),
+        lo + minmax_indices(y[lo:hi], max_points),
+        hi + minmax_indices(y[hi:], context),
+    ))
+
+
+def _take(values, idx):
+    if hasattr(values, 'iloc'):
+        return values.iloc[idx]
+    if hasattr(values, 'take'):
+        return values.take(idx)
+    return np.asarray(values)[idx]
+
+
+def decimate(x, y, max_points=None, window=None):
+    if max_points is None:
+        max_points = max_points_for_width()
+    if window is not None:
+        idx = window_indices(y, window, max_points)
+    elif len(y) <= max_points:
+        return x, y
+    else:
+        idx = minmax_indices(y, max_points)
+    return _take(x, idx), _take(y, idx)
@@ -0,0 +1,187 @@
+import argparse
+import os
+import socket
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Live bar feeds for the streaming mode. A feed is polled for bars that
+# arrived since the previous poll and returns them as a frame of Close prices
+# indexed by date; a FeedRunner thread hands each non-empty batch to the app.
+# Both feeds read "date,close" lines:
+#
+#   file:<path>        follow a CSV file another process appends to
+#   tcp:<host>:<port>  read lines from a TCP server
+#
+# `python feeds.py file ticks.csv` and `python feeds.py serve --port 9009`
+# produce a synthetic random walk for either one.
+
+
+def parse_bars(lines):
+    dates = []
+    closes = []
+    for line in lines:
+        parts = line.strip().split(',')
+        if len(parts) < 2:
+            continue
+        try:
+            date = pd.Timestamp(parts[0])
+            close = float(parts[1])
+        except ValueError:
+            # Header rows and partial or malformed lines are skipped
+            continue
+        dates.append(date)
+        closes.append(close)
+    return pd.DataFrame({'Close': closes}, index=pd.DatetimeIndex(dates, name='Date'))
+
+
+class FileTailFeed:
+    def __init__(self, path, from_start=True):
+        self.path = path
+        self.offset = 0 if from_start or not os.path.exists(path) else os.path.getsize(path)
+        self._partial = ''
+
+    def poll(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return parse_bars([])
+        if size < self.offset:
+            # The file was truncated or replaced; start over
+            self.offset = 0
+            self._partial = ''
+        with open(self.path) as handle:
+            handle.seek(self.offset)
+            text = self._partial + handle.read()
+            self.offset = handle.tell()
+        lines = text.split('\n')
+        self._partial = lines.pop()
+        return parse_bars(lines)
+
+
+class SocketFeed:
+    def __init__(self, host, port, timeout=1.0):
+        self.address = (host, int(port))
+        self.timeout = timeout
+        self._socket = None
+        self._partial = b''
+
+    def _connect(self):
+        try:
+            self._socket = socket.create_connection(self.address, timeout=self.timeout)
+            self._socket.setblocking(False)
+        except OSError:
+            self._socket = None
+
+    def poll(self):
+        if self._socket is None:
+            self._connect()
+            if self._socket is None:
+                return parse_bars([])
+        data = self._partial
+        while True:
+            try:
+                chunk = self._socket.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                chunk = b''
+            if not chunk:
+                # Server went away; reconnect on the next poll
+                self._socket.close()
+                self._socket = None
+                break
+            data += chunk
+        lines = data.split(b'\n')
+        self._partial = lines.pop()
+        return parse_bars(line.decode('utf-8', 'replace') for line in lines)
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+def open_feed(spec):
+    kind, _, target = spec.partition(':')
+    if kind == 'file':
+        return FileTailFeed(target)
+    if kind == 'tcp':
+        host, _, port = target.rpartition(':')
+        return SocketFeed(host or 'localhost', port)
+    raise ValueError(f"Unknown feed {spec!r}; expected file:<path> or tcp:<host>:<port>")
+
+
+class FeedRunner(threading.Thread):
+    def __init__(self, feed, on_bars, interval=1.0):
+        super().__init__(name='feed-runner', daemon=True)
+        self.feed = feed
+        self.on_bars = on_bars
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                bars = self.feed.poll()
+                if len(bars):
+                    self.on_bars(bars)
+            except Exception as e:
+                # A bad batch should not end the stream
+                print(f"Feed error: {type(e).__name__}: {e}")
+            self._stopped.wait(self.interval)
+
+    def stop(self):
+        self._stopped.set()
+
+
+def random_walk(start_price, start_date, seed):
+    rng = np.random.default_rng(seed)
+    price = start_price
+    date = pd.Timestamp(start_date).normalize()
+    while True:
+        price = max(price * (1 + rng.normal(0, 0.01)), 0.01)
+        yield f"{date:%Y-%m-%d},{price:.2f}\n"
+        date += pd.Timedelta(days=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Produce synthetic bars for the streaming mode")
+    parser.add_argument('mode', choices=['file', 'serve'])
+    parser.add_argument('path', nargs='?', default='ticks.csv', help="file to append to (file mode)")
+    parser.add_argument('--port', type=int, default=9009, help="port to serve on (serve mode)")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between bars")
+    parser.add_argument('--price', type=float, default=150.0, help="starting price")
+    parser.add_argument('--start-date', default=pd.Timestamp.today().strftime('%Y-%m-%d'))
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    ticks = random_walk(args.price, args.start_date, args.seed)
+    if args.mode == 'file':
+        while True:
+            with open(args.path, 'a') as handle:
+                handle.write(next(ticks))
+            time.sleep(args.interval)
+
+    clients = []
+    server = socket.create_server(('', args.port))
+    server.setblocking(False)
+    print(f"Serving bars on port {args.port}")
+    while True:
+        try:
+            clients.append(server.accept()[0])
+        except BlockingIOError:
+            pass
+        line = next(ticks).encode()
+        for client in list(clients):
+            try:
+                client.sendall(line)
+            except OSError:
+                clients.remove(client)
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+# Production server: gunicorn -c gunicorn.conf.py
+#
+# The app is imported once in the master (preload_app), which loads the data
+# and builds the predictions and pages before forking; workers share all of
+# it copy-on-write, so adding workers adds neither startup time nor a copy of
+# the data per worker. Each worker starts its own background threads once it
+# has the app. STOCKS_PRELOAD=0 makes every worker import and warm up the
+# app itself.
+os.environ.setdefault('STOCKS_PRELOAD', '1')
+
+# Workers add up their /metrics through this directory, one per server run
+os.environ.setdefault('STOCKS_METRICS_DIR', os.path.join(tempfile.gettempdir(), f'stocks-metrics-{os.getpid()}'))
+
+# After the defaults above, so config sees them
+from config import env_flag  # noqa: E402
+
+wsgi_app = 'app:server'
+bind = os.environ.get('STOCKS_BIND', '0.0.0.0:8080')
+workers = int(os.environ.get('STOCKS_WORKERS', '2'))
+threads = int(os.environ.get('STOCKS_THREADS', '4'))
+preload_app = env_flag('STOCKS_PRELOAD')
+timeout = 120
+
+
+def post_worker_init(worker):
+    # Without preload the worker's import of app.py has started them already
+    if worker.cfg.preload_app:
+        from app import start_background_work
+        start_background_work()
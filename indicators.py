@@ -0,0 +1,185 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Technical indicators for every symbol of a SymbolStore. The first request
+# for an (indicator, params) pair computes it for all symbols in one
+# vectorized pass over the store's flat, symbol-sorted columns, with every
+# rolling sum and exponential average restarted at each symbol's first row.
+# The result is cached per (symbol, indicator, params).
+
+# Default parameters; each indicator's outputs are listed in OUTPUTS
+DEFAULTS = {
+    'sma': (20,),
+    'ema': (20,),
+    'bollinger': (20, 2.0),
+    'rsi': (14,),
+    'atr': (14,),
+    'vwap': (20,),
+}
+OUTPUTS = {
+    'sma': ('sma',),
+    'ema': ('ema',),
+    'bollinger': ('middle', 'upper', 'lower'),
+    'rsi': ('rsi',),
+    'atr': ('atr',),
+    'vwap': ('vwap',),
+}
+
+
+def _bars_seen(first):
+    # 1-based position of every row within its symbol
+    return np.arange(len(first)) - first + 1
+
+
+def rolling_sum(values, first, window):
+    # Trailing sum over at most `window` rows of the same symbol; NaN until
+    # a full window is available and wherever the window holds a NaN. NaNs
+    # are summed as zero and counted separately, so a missing value only
+    # affects the windows that contain it.
+    valid = ~np.isnan(values)
+    totals = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+    positions = np.arange(len(values))
+    lo = np.maximum(positions - window + 1, first)
+    result = totals[positions + 1] - totals[lo]
+    result[(_bars_seen(first) < window) | (counts[positions + 1] - counts[lo] < window)] = np.nan
+    return result
+
+
+def first_valid(values, first):
+    # Each row's first non-NaN value of its symbol, or 0 for a symbol
+    # without any
+    starts = np.unique(first)
+    valid = np.flatnonzero(~np.isnan(values))
+    ends = np.append(starts[1:], len(values))
+    found = np.searchsorted(valid, starts)
+    anchors = np.zeros(len(starts))
+    hit = found < len(valid)
+    hit[hit] = valid[found[hit]] < ends[hit]
+    anchors[hit] = values[valid[found[hit]]]
+    return anchors[np.searchsorted(starts, first)]
+
+
+def ewm(values, first, alpha):
+    # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], seeded with each symbol's
+    # first value. One pandas pass runs straight through the symbol
+    # boundaries; the carried-over error decays geometrically, so it is
+    # removed in closed form: y'[t] = y[t] + b**(t-s+1) * (x[s] - y[s-1]).
+    result = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy(copy=True)
+    starts = np.unique(first)
+    starts = starts[starts > 0]
+    if len(starts):
+        error = np.zeros(len(values))
+        error[starts] = values[starts] - result[starts - 1]
+        error = error[first]
+        decay = 1.0 - alpha
+        with np.errstate(under='ignore'):
+            result = result + np.power(decay, _bars_seen(first)) * error
+    return result
+
+
+def previous_close(close, first):
+    # Prior close within the symbol; a symbol's first row has none
+    previous = np.empty_like(close)
+    previous[1:] = close[:-1]
+    starts = np.unique(first)
+    previous[starts] = np.nan
+    return previous
+
+
+def true_range(high, low, close, first):
+    previous = previous_close(close, first)
+    with np.errstate(invalid='ignore'):
+        ranges = np.fmax(high - low, np.fmax(np.abs(high - previous), np.abs(low - previous)))
+    return ranges
+
+
+def compute(name, params, high, low, close, volume, first):
+    # Vectorized indicator over flat arrays; returns output name -> array
+    seen = _bars_seen(first)
+    if name == 'sma':
+        window, = params
+        return {'sma': rolling_sum(close, first, window) / window}
+    if name == 'ema':
+        window, = params
+        result = ewm(close, first, 2.0 / (window + 1))
+        result[seen < window] = np.nan
+        return {'ema': result}
+    if name == 'bollinger':
+        window, width = params
+        # Shift by each symbol's first close so the sum of squares keeps its precision
+        anchor = first_valid(close, first)
+        shifted = close - anchor
+        mean = rolling_sum(shifted, first, window) / window
+        variance = rolling_sum(shifted * shifted, first, window) / window - mean * mean
+        std = np.sqrt(np.maximum(variance, 0.0))
+        middle = mean + anchor
+        return {'middle': middle, 'upper': middle + width * std, 'lower': middle - width * std}
+    if name == 'rsi':
+        window, = params
+        change = np.nan_to_num(close - previous_close(close, first))
+        gain = ewm(np.maximum(change, 0.0), first, 1.0 / window)
+        loss = ewm(np.maximum(-change, 0.0), first, 1.0 / window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = 100.0 * gain / (gain + loss)
+        result[seen <= window] = np.nan
+        return {'rsi': result}
+    if name == 'atr':
+        window, = params
+        result = ewm(true_range(high, low, close, first), first, 1.0 / window)
+        result[seen < window] = np.nan
+        return {'atr': result}
+    if name == 'vwap':
+        window, = params
+        typical = (high + low + close) / 3.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = rolling_sum(typical * volume, first, window) / rolling_sum(volume, first, window)
+        return {'vwap': result}
+    raise ValueError(f"Unknown indicator {name!r}")
+
+
+class IndicatorEngine:
+    def __init__(self, store):
+        self.store = store
+        self._series = {}
+        self._computed = set()
+        self._lock = threading.Lock()
+
+    def _flat_inputs(self):
+        frame = self.store.frame
+        high = frame['High'].to_numpy(dtype=np.float64)
+        low = frame['Low'].to_numpy(dtype=np.float64)
+        if 'Close' in frame.columns:
+            close = frame['Close'].to_numpy(dtype=np.float64)
+        else:
+            close = (high + low) / 2.0
+        volume = frame['Volume'].to_numpy(dtype=np.float64) if 'Volume' in frame.columns else np.ones(len(frame))
+
+        first = np.zeros(len(frame), dtype=np.int64)
+        for start, stop in self.store.offsets.values():
+            first[start:stop] = start
+        return high, low, close, volume, first
+
+    def _compute_all(self, name, params):
+        high, low, close, volume, first = self._flat_inputs()
+        outputs = compute(name, params, high, low, close, volume, first)
+        for symbol, (start, stop) in self.store.offsets.items():
+            columns = {output: outputs[output][start:stop] for output in OUTPUTS[name]}
+            self._series.setdefault(symbol, {})[(name, params)] = pd.DataFrame(columns)
+
+    def get(self, symbol, name, params=None):
+        # Frame of the indicator's outputs, one row per bar of the symbol
+        params = tuple(params or DEFAULTS[name])
+        with self._lock:
+            if (name, params) not in self._computed:
+                self._compute_all(name, params)
+                self._computed.add((name, params))
+            series = self._series.get(symbol, {}).get((name, params))
+            return series if series is not None else pd.DataFrame(columns=OUTPUTS[name])
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+            self._computed.clear()
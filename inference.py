@@ -0,0 +1,266 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from windows import WINDOW, sliding_windows
+
+
+class ModelUnavailable(RuntimeError):
+    pass
+
+
+def scale_series(values):
+    # Min/max scale one series to [0, 1] the way the notebooks' MinMaxScaler
+    # does; returns the scaled values and the (low, span) to undo it
+    values = np.asarray(values, dtype=np.float32)
+    low = np.nanmin(values)
+    span = np.nanmax(values) - low
+    if not span:
+        span = 1.0
+    return (values - low) / span, (low, span)
+
+
+# Runs a Keras model file through model.predict
+class KerasBackend:
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.model = None
+
+    def load(self):
+        try:
+            from tensorflow.keras.models import load_model
+        except ImportError as e:
+            raise ModelUnavailable(f"TensorFlow is not installed: {e}")
+        try:
+            model = load_model(self.model_path, compile=False)
+        except (OSError, ValueError) as e:
+            raise ModelUnavailable(f"Could not load {self.model_path}: {e}")
+        if not model.layers:
+            raise ModelUnavailable(f"{self.model_path} contains no layers")
+        self.model = model
+
+    def predict(self, windows, batch_size):
+        return self.model.predict(windows, batch_size=batch_size, verbose=0).reshape(-1)
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def make_backend(name, model_path):
+    if name == 'keras':
+        return KerasBackend(model_path)
+    if name == 'tflite':
+        from tflite_backend import TFLiteBackend
+        return TFLiteBackend(model_path)
+    raise ValueError(f"Unknown inference backend {name!r}")
+
+
+# Serves LSTM predictions from saved_model.h5 (or its TFLite conversion). The
+# model is loaded and warmed up once per process, prediction requests for many
+# symbols are stacked into one predict call, and results are cached per (model
+# version, symbol, last bar date) so a page render never waits on the model
+# for data it has seen.
+class InferenceEngine:
+    def __init__(self, model_path, window=WINDOW, batch_size=1024, max_cache_entries=4096, backend='keras'):
+        self.model_path = model_path
+        self.window = window
+        self.batch_size = batch_size
+        self.max_cache_entries = max_cache_entries
+        self.backend_name = backend
+        self.backend = make_backend(backend, model_path)
+        self.model = None
+        self.version = None
+        self.signature = None
+        self.tracking = False
+        self.load_error = None
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._scales = {}
+        self._load_lock = threading.Lock()
+        self._predict_lock = threading.Lock()
+        self._cache_lock = threading.Lock()
+
+    def load(self):
+        if self.model is not None:
+            return self.model
+        with self._load_lock:
+            # A failed load is remembered so callers don't retry it per request
+            if self.load_error is not None:
+                raise ModelUnavailable(self.load_error)
+            if self.model is None:
+                try:
+                    self.backend.load()
+                except ModelUnavailable as e:
+                    self.load_error = str(e)
+                    self.signature = file_signature(self.model_path)
+                    self.tracking = True
+                    raise
+
+                # Run one batch so graph tracing happens here, not in a request
+                self.backend.predict(np.zeros((1, self.window, 1), dtype=np.float32), 1)
+                self.signature = file_signature(self.model_path)
+                self.tracking = True
+                with open(self.model_path, 'rb') as handle:
+                    self.version = hashlib.sha1(handle.read()).hexdigest()[:12]
+                self.model = self.backend
+        return self.model
+
+    def adopt(self, version):
+        # Record that predictions were made from the current model file by
+        # another process (predict_in_subprocess), so version and
+        # model_changed() hold before this process loads the model itself
+        self.version = version
+        self.signature = file_signature(self.model_path)
+        self.tracking = True
+
+    def model_changed(self):
+        # True once the model file differs from the one loaded (or from the
+        # missing/unusable file that failed to load); False before any load
+        if not self.tracking:
+            return False
+        return file_signature(self.model_path) != self.signature
+
+    def reset(self):
+        # Drop the loaded model and every cached prediction; the next call
+        # loads whatever model file is in place now
+        with self._load_lock:
+            self.backend = make_backend(self.backend_name, self.model_path)
+            self.model = None
+            self.version = None
+            self.signature = None
+            self.tracking = False
+            self.load_error = None
+        with self._cache_lock:
+            self._cache.clear()
+            self._scales.clear()
+
+    def predict_windows(self, windows):
+        backend = self.load()
+        if not len(windows):
+            return np.empty(0, dtype=np.float32)
+        with self._predict_lock:
+            return backend.predict(np.ascontiguousarray(windows, dtype=np.float32), self.batch_size)
+
+    def predict(self, requests):
+        # requests maps symbol -> (dates, closes, start): predict the close of
+        # every bar from position `start` on, each from the `window` closes
+        # before it. Returns symbol -> predictions aligned with closes[start:]
+        # (NaN where fewer than `window` bars precede the position).
+        self.load()
+        results = {}
+        pending = []
+        for symbol, (dates, closes, start) in requests.items():
+            key = (self.version, symbol, str(dates[-1]) if len(dates) else None)
+            cached = self._lookup(key)
+            if cached is not None and cached[0] <= start:
+                results[symbol] = cached[1][start - cached[0]:]
+                continue
+            pending.append((symbol, key, closes, start))
+
+        if pending:
+            batches = []
+            scales = []
+            for symbol, key, closes, start in pending:
+                scaled, scale = scale_series(closes)
+                first = max(start, self.window)
+                batches.append(sliding_windows(scaled[first - self.window:], self.window))
+                scales.append(scale)
+            outputs = np.split(self.predict_windows(np.concatenate(batches)),
+                               np.cumsum([len(batch) for batch in batches])[:-1])
+
+            for (symbol, key, closes, start), (low, span), output in zip(pending, scales, outputs):
+                predictions = np.full(len(closes) - start, np.nan, dtype=np.float32)
+                predictions[len(predictions) - len(output):] = output * span + low
+                results[symbol] = predictions
+                self._scales[symbol] = (low, span)
+                self._remember(key, start, predictions)
+
+        return results
+
+    def extend(self, updates):
+        # Incremental counterpart of predict() for newly arrived bars. updates
+        # maps symbol -> (dates, closes, count) where the last `count` bars of
+        # closes are new. Only the windows ending before those bars are built,
+        # all symbols share one predict call, and each symbol keeps the scale
+        # fitted by its first predict() so earlier predictions stay valid.
+        # Returns symbol -> predictions for the new bars.
+        self.load()
+        batches = []
+        scales = []
+        for symbol, (dates, closes, count) in updates.items():
+            scale = self._scales.get(symbol)
+            if scale is None:
+                _, scale = scale_series(closes[:len(closes) - count])
+                self._scales[symbol] = scale
+            low, span = scale
+            tail = np.asarray(closes[max(len(closes) - count - self.window, 0):], dtype=np.float32)
+            windows = sliding_windows((tail - low) / span, self.window)
+            batches.append(windows[len(windows) - min(count, len(windows)):])
+            scales.append(scale)
+        if not batches:
+            return {}
+
+        outputs = np.split(self.predict_windows(np.concatenate(batches)),
+                           np.cumsum([len(batch) for batch in batches])[:-1])
+
+        results = {}
+        for (symbol, (dates, closes, count)), (low, span), output in zip(updates.items(), scales, outputs):
+            predictions = np.full(count, np.nan, dtype=np.float32)
+            predictions[count - len(output):] = output * span + low
+            results[symbol] = predictions
+
+            # Carry the cached series forward to the new last bar
+            previous = self._lookup((self.version, symbol, str(dates[-count - 1]) if len(dates) > count else None))
+            if previous is not None:
+                start, cached = previous
+                self._remember((self.version, symbol, str(dates[-1])), start,
+                               np.concatenate((cached, predictions)))
+        return results
+
+    def _lookup(self, key):
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._cache.move_to_end(key)
+            return cached
+
+    def _remember(self, key, start, predictions):
+        with self._cache_lock:
+            self._cache[key] = (start, predictions)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_cache_entries:
+                self._cache.popitem(last=False)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+
+def _predict_requests(model_path, backend, requests):
+    engine = InferenceEngine(model_path, backend=backend)
+    return engine.predict(requests), engine.version
+
+
+def predict_in_subprocess(model_path, requests, backend='keras'):
+    # InferenceEngine.predict() run in a freshly spawned process, for a parent
+    # that is about to fork workers (TensorFlow and the TFLite interpreter
+    # start thread pools that do not survive a fork) or that should not load
+    # the model until it needs it. Returns (predictions, model version) and
+    # raises ModelUnavailable like predict().
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_predict_requests, model_path, backend, requests).result()
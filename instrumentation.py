@@ -0,0 +1,231 @@
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+# Prometheus metrics for the Dash callbacks: latency and response size
+# histograms and request/error counts per callback, plus counters the app
+# registers through collectors (cache hits and misses). The text format is
+# written here rather than with prometheus_client, to keep the dependency
+# list unchanged.
+#
+# Under a multi-process server every worker has its own registry. With a
+# metrics directory set (gunicorn.conf.py sets one per server), each process
+# writes a snapshot there every few seconds and on every scrape, and /metrics
+# sums the snapshots of all processes, so the counters a scrape sees never go
+# backwards whichever worker answers it.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRIC_TYPES = {
+    'dash_callback_duration_seconds': ('histogram', "Time to answer a Dash callback request", LATENCY_BUCKETS),
+    'dash_callback_response_bytes': ('histogram', "Uncompressed size of Dash callback responses", SIZE_BUCKETS),
+    'dash_callback_requests_total': ('counter', "Dash callback requests by HTTP status", None),
+    'dash_callback_errors_total': ('counter', "Dash callback requests that failed with a server error", None),
+    'stocks_cache_requests_total': ('counter', "Cache lookups by cache and result (hit or miss)", None),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    def __init__(self, directory=None, flush_interval=5.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._baseline = {}
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        buckets = METRIC_TYPES[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            # Per-bucket counts (not cumulative), then the sum and the count
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(buckets) + 3)
+            index = next((i for i, bound in enumerate(buckets) if value <= bound), len(buckets))
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def add_collector(self, collect):
+        # collect() returns (name, labels, value) counter samples, read at
+        # snapshot time from counts the app keeps anyway
+        self._collectors.append(collect)
+
+    def _collected(self):
+        samples = {}
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                key = (name, _label_key(labels))
+                samples[key] = samples.get(key, 0) + value
+        return samples
+
+    def rebase(self):
+        # Count collector samples from here on. A worker forked from a
+        # preloaded master inherits the master's cache counts, which would
+        # otherwise be added once per worker.
+        self._baseline = self._collected()
+
+    def snapshot(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+        for key, value in self._collected().items():
+            counters[key] = counters.get(key, 0) + value - self._baseline.get(key, 0)
+        return {
+            'counters': [[name, list(labels), value] for (name, labels), value in counters.items()],
+            'histograms': [[name, list(labels), counts] for (name, labels), counts in histograms.items()],
+        }
+
+    def flush(self):
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        # Snapshots of every process sharing the directory (just this one
+        # without a directory), summed
+        if not self.directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush()
+            snapshots = []
+            for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+                try:
+                    with open(path) as handle:
+                        snapshots.append(json.load(handle))
+                except (OSError, ValueError):
+                    continue
+        counters = {}
+        histograms = {}
+        for snapshot in snapshots:
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, counts in snapshot['histograms']:
+                key = (name, tuple(map(tuple, labels)))
+                total = histograms.get(key)
+                histograms[key] = counts if total is None else [a + b for a, b in zip(total, counts)]
+        return counters, histograms
+
+    def exposition(self):
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRIC_TYPES.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                continue
+            for (metric, labels), counts in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), counts):
+                    cumulative += count
+                    le = bound if bound == '+Inf' else _format_value(bound)
+                    lines.append(f'{name}_bucket{_format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(counts[-2])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {counts[-1]}')
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsFlusher(threading.Thread):
+    # Keeps this process's snapshot in the metrics directory current, so a
+    # scrape answered by another worker includes it
+    def __init__(self, registry):
+        super().__init__(name='metrics-flusher', daemon=True)
+        self.registry = registry
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.registry.flush_interval):
+            try:
+                self.registry.flush()
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def instrument_callbacks(app, registry):
+    # Time every request to the Dash callback endpoint and record its
+    # response size and status under the callback function's name. Runs as
+    # Flask request hooks, so callbacks registered later are covered too.
+    server = app.server
+    names = {}
+
+    def callback_name(output):
+        # Outputs that match no callback share one label, so clients cannot
+        # create series at will
+        name = names.get(output)
+        if name is None:
+            if output not in app.callback_map:
+                return 'unknown'
+            callback = app.callback_map[output].get('callback')
+            name = names[output] = getattr(callback, '__name__', None) or output
+        return name
+
+    @server.before_request
+    def start_callback_timer():
+        if request.path.endswith('/_dash-update-component'):
+            g.callback_started = time.perf_counter()
+
+    # Registered after compression, so it runs first and sees the
+    # uncompressed body
+    @server.after_request
+    def record_callback(response):
+        started = g.pop('callback_started', None)
+        if started is None:
+            return response
+        body = request.get_json(silent=True) or {}
+        labels = {'callback': callback_name(body.get('output', ''))}
+        registry.observe('dash_callback_duration_seconds', labels, time.perf_counter() - started)
+        registry.inc('dash_callback_requests_total', dict(labels, status=str(response.status_code)))
+        if response.status_code >= 500:
+            registry.inc('dash_callback_errors_total', labels)
+        elif not response.is_streamed:
+            registry.observe('dash_callback_response_bytes', labels, len(response.get_data()))
+        return response
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(registry.exposition(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,154 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Running sums kept per bar; every metric is a ratio of two of them, so totals
+# and rolling windows are differences of cumulative sums
+COUNT, ABS, SQUARED, PCT_COUNT, PCT, DIR_COUNT, HITS = range(7)
+COLUMNS = 7
+
+
+def _ratio(numerator, denominator, scale=1.0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator * scale, np.nan)
+
+
+def metric_columns(sums, prefix=''):
+    # sums is [..., COLUMNS]; returns metric name -> array
+    return {
+        f'{prefix}mae': _ratio(sums[..., ABS], sums[..., COUNT]),
+        f'{prefix}mape': _ratio(sums[..., PCT], sums[..., PCT_COUNT], 100.0),
+        f'{prefix}rmse': np.sqrt(_ratio(sums[..., SQUARED], sums[..., COUNT])),
+        f'{prefix}directional_accuracy': _ratio(sums[..., HITS], sums[..., DIR_COUNT], 100.0),
+    }
+
+
+def bar_terms(actual, predicted, previous):
+    # Per-bar contributions to the running sums. Bars without a prediction
+    # (the model's warm-up span) count for nothing; a direction is a hit when
+    # the predicted move from the previous close has the sign of the real one.
+    error = predicted - actual
+    valid = ~np.isnan(error) & ~np.isnan(actual)
+    has_pct = valid & (actual != 0)
+    has_dir = valid & ~np.isnan(previous)
+
+    terms = np.zeros((len(actual), COLUMNS))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        terms[:, COUNT] = valid
+        terms[:, ABS] = np.where(valid, np.abs(error), 0.0)
+        terms[:, SQUARED] = np.where(valid, error * error, 0.0)
+        terms[:, PCT_COUNT] = has_pct
+        terms[:, PCT] = np.where(has_pct, np.abs(error / actual), 0.0)
+        terms[:, DIR_COUNT] = has_dir
+        terms[:, HITS] = has_dir & (np.sign(predicted - previous) == np.sign(actual - previous))
+    return terms
+
+
+# Forecast-error metrics (MAE, MAPE, RMSE, directional accuracy and their
+# rolling-window versions) for any number of symbols. update() takes only the
+# newly appended bars; all symbols in one update are processed as a single
+# flat array, and per-symbol cumulative sums are appended to buffers that
+# double in capacity when full, so an update costs O(new bars). summary() is
+# cached until the next update, so cards and tables built from it cost a
+# lookup.
+class ForecastMetrics:
+    def __init__(self, rolling_window=20):
+        self.rolling_window = rolling_window
+        self.symbols = []
+        self.version = 0
+        self._slots = {}
+        self._totals = np.zeros((0, COLUMNS))
+        self._last_actual = np.empty(0)
+        self._cumulative = {}
+        self._lengths = {}
+        self._summary = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol):
+        return symbol in self._slots
+
+    def update(self, updates):
+        # updates maps symbol -> (actual, predicted) for bars appended since
+        # the previous update
+        updates = {symbol: (np.asarray(actual, dtype=np.float64), np.asarray(predicted, dtype=np.float64))
+                   for symbol, (actual, predicted) in updates.items() if len(actual)}
+        if not updates:
+            return
+        with self._lock:
+            for symbol in updates:
+                if symbol not in self._slots:
+                    self._slots[symbol] = len(self.symbols)
+                    self.symbols.append(symbol)
+            grow = len(self.symbols) - len(self._totals)
+            if grow:
+                self._totals = np.vstack((self._totals, np.zeros((grow, COLUMNS))))
+                self._last_actual = np.concatenate((self._last_actual, np.full(grow, np.nan)))
+
+            symbols = list(updates)
+            slots = np.array([self._slots[symbol] for symbol in symbols])
+            lengths = np.array([len(actual) for actual, _ in updates.values()])
+            stops = np.cumsum(lengths)
+            starts = stops - lengths
+            actual = np.concatenate([actual for actual, _ in updates.values()])
+            predicted = np.concatenate([predicted for _, predicted in updates.values()])
+
+            # Previous close of every bar; each symbol's first new bar follows
+            # the last bar of its previous update
+            previous = np.empty_like(actual)
+            previous[1:] = actual[:-1]
+            previous[starts] = self._last_actual[slots]
+
+            terms = bar_terms(actual, predicted, previous)
+            self._totals[slots] += np.add.reduceat(terms, starts, axis=0)
+            self._last_actual[slots] = actual[stops - 1]
+
+            # Per-symbol cumulative sums from one global cumsum
+            running = np.cumsum(terms, axis=0)
+            base = np.vstack((np.zeros((1, COLUMNS)), running))[starts]
+            for symbol, start, stop, offset in zip(symbols, starts, stops, base):
+                buffer = self._cumulative.get(symbol)
+                if buffer is None:
+                    buffer = self._cumulative[symbol] = np.zeros((max(stop - start + 1, 16), COLUMNS))
+                    self._lengths[symbol] = 1
+                length = self._lengths[symbol]
+                needed = length + stop - start
+                if needed > len(buffer):
+                    grown = np.zeros((max(needed, 2 * len(buffer)), COLUMNS))
+                    grown[:length] = buffer[:length]
+                    buffer = self._cumulative[symbol] = grown
+                buffer[length:needed] = running[start:stop] - offset + buffer[length - 1]
+                self._lengths[symbol] = needed
+
+            self.version += 1
+            self._summary = None
+
+    def summary(self):
+        # One row per symbol: overall metrics, the bar count they cover and
+        # the same metrics over the last rolling_window bars
+        with self._lock:
+            if self._summary is None:
+                window = self.rolling_window
+                recent = np.array([cumulative[-1] - cumulative[max(len(cumulative) - 1 - window, 0)]
+                                   for cumulative in map(self._prefix, self.symbols)])
+                recent = recent.reshape(-1, COLUMNS)
+                columns = metric_columns(self._totals)
+                columns['count'] = self._totals[:, COUNT].astype(np.int64)
+                columns.update(metric_columns(recent, 'rolling_'))
+                self._summary = pd.DataFrame(columns, index=pd.Index(self.symbols, name='symbol'))
+            return self._summary
+
+    def _prefix(self, symbol):
+        # The filled rows of a symbol's cumulative sums, starting with zeros.
+        # Rows are never rewritten, so the view stays valid after the lock
+        # is released.
+        return self._cumulative[symbol][:self._lengths[symbol]]
+
+    def rolling(self, symbol, window=None):
+        # Per-bar metrics over the trailing `window` bars of one symbol, in
+        # the order the bars were added
+        window = window or self.rolling_window
+        with self._lock:
+            cumulative = self._prefix(symbol)
+        starts = np.maximum(np.arange(1, len(cumulative)) - window, 0)
+        return pd.DataFrame(metric_columns(cumulative[1:] - cumulative[starts]))
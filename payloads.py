@@ -0,0 +1,111 @@
+import base64
+import os
+import re
+
+import numpy as np
+
+try:
+    from flask_compress import Compress
+except ImportError:
+    Compress = None
+
+# Smaller figure payloads for slow links. Numeric and date series can be sent
+# as base64 typed arrays ({'dtype': 'f4', 'bdata': ...}, understood by
+# plotly.js 2.28+) instead of JSON number and ISO date text, and responses
+# can be gzip/brotli compressed.
+
+# Largest relative error accepted when a float series is sent as float32
+FLOAT32_TOLERANCE = 1e-6
+
+COMPRESSED_MIMETYPES = ['application/json', 'text/html', 'text/css', 'application/javascript']
+
+# Oldest plotly.js that decodes typed arrays
+TYPED_ARRAY_PLOTLYJS = (2, 28)
+
+
+def typed_array(values):
+    # Smallest lossless-enough typed array for a series, or None when it is
+    # not numeric. Dates become epoch milliseconds, which a 'date' axis reads
+    # as is; integers stay integers when they fit in 32 bits and floats drop
+    # to float32 when that stays within FLOAT32_TOLERANCE.
+    values = np.asarray(values)
+    if values.ndim != 1:
+        return None
+    if np.issubdtype(values.dtype, np.datetime64):
+        missing = np.isnat(values)
+        values = values.astype('datetime64[ms]').astype(np.int64).astype(np.float64)
+        values[missing] = np.nan
+        dtype = 'f8'
+    elif values.dtype.kind == 'b':
+        dtype = 'u1'
+    elif values.dtype.kind in 'iu':
+        low, high = (values.min(), values.max()) if len(values) else (0, 0)
+        if low >= -2 ** 31 and high < 2 ** 31:
+            dtype = 'i4'
+        elif low >= 0 and high < 2 ** 32:
+            dtype = 'u4'
+        else:
+            dtype = 'f8'
+    elif values.dtype.kind == 'f':
+        with np.errstate(over='ignore'):
+            narrow = values.astype(np.float32)
+        exact = np.allclose(narrow, values, rtol=FLOAT32_TOLERANCE, atol=0, equal_nan=True)
+        dtype = 'f4' if exact else 'f8'
+    else:
+        return None
+    data = np.ascontiguousarray(values, dtype=f'<{dtype}')
+    return {'dtype': dtype, 'bdata': base64.b64encode(data.tobytes()).decode('ascii')}
+
+
+def encode_figure(figure, keys=('x', 'y')):
+    # Copy of a {'data': traces, 'layout': ...} figure with the given trace
+    # arrays replaced by typed arrays. Date x values arrive as numbers, so
+    # the figure's x axis must have type 'date'.
+    traces = []
+    for trace in figure['data']:
+        trace = trace.to_plotly_json() if hasattr(trace, 'to_plotly_json') else dict(trace)
+        for key in keys:
+            if key in trace:
+                encoded = typed_array(trace[key])
+                if encoded is not None:
+                    trace[key] = encoded
+        traces.append(trace)
+    return dict(figure, data=traces)
+
+
+def served_plotlyjs_version():
+    # The plotly.js the browser gets: Dash 2 bundles its own copy with dcc,
+    # Dash 3 and later serve the one in the plotly package
+    from dash import dcc
+
+    try:
+        with open(os.path.join(os.path.dirname(dcc.__file__), 'plotly.min.js')) as handle:
+            match = re.search(r'plotly\.js v(\d+)\.(\d+)\.(\d+)', handle.read(4096))
+    except OSError:
+        from plotly.offline import get_plotlyjs_version
+        match = re.match(r'(\d+)\.(\d+)\.(\d+)', get_plotlyjs_version())
+    return tuple(int(part) for part in match.groups()) if match else None
+
+
+def typed_arrays_supported():
+    # (supported, version text) for the served plotly.js; an older copy
+    # would draw typed-array series as empty charts
+    version = served_plotlyjs_version()
+    if version is None:
+        return False, 'unknown'
+    return version[:2] >= TYPED_ARRAY_PLOTLYJS, '.'.join(map(str, version))
+
+
+def enable_compression(server, min_size=1024):
+    # Compress responses of at least min_size bytes with brotli or gzip,
+    # whichever the client accepts first
+    if Compress is None:
+        print("flask-compress is not installed; responses are sent uncompressed")
+        return False
+    server.config.update(
+        COMPRESS_MIN_SIZE=min_size,
+        COMPRESS_ALGORITHM=['br', 'gzip'],
+        COMPRESS_MIMETYPES=COMPRESSED_MIMETYPES
+    )
+    Compress(server)
+    return True
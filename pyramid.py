@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from data_store import SymbolStore
+
+# Coarser bars for long-range charts. Every symbol's daily bars are resampled
+# once to weekly, monthly and quarterly OHLCV (first open, highest high,
+# lowest low, last close, summed volume, plus the number of daily bars in
+# each), and chart builders take the coarsest level that still has enough
+# bars to fill the chart, so a multi-year view touches a few hundred rows.
+
+LEVELS = (('weekly', 'W'), ('monthly', 'M'), ('quarterly', 'Q'))
+
+
+def resample_ohlcv(frame, freq, key='Stock', date_col='Date'):
+    # frame must be sorted by key and date (as SymbolStore keeps it). Each
+    # run of rows with the same symbol and period becomes one bar; the runs
+    # are found with one comparison pass and reduced with ufunc.reduceat, so
+    # all symbols are resampled together without a groupby.
+    n = len(frame)
+    columns = [col for col in ('Open', 'High', 'Low', 'Close', 'Volume') if col in frame.columns]
+    if not n:
+        return frame.iloc[:0][[key, date_col] + columns].assign(Bars=np.empty(0, dtype=np.int64))
+
+    dates = pd.DatetimeIndex(frame[date_col].to_numpy())
+    periods = dates.to_period(freq).asi8
+    keys = frame[key].to_numpy()
+    changed = (periods[1:] != periods[:-1]) | (keys[1:] != keys[:-1])
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    stops = np.append(starts[1:], n)
+
+    out = {key: keys[starts], date_col: dates[starts]}
+    if 'Open' in columns:
+        out['Open'] = frame['Open'].to_numpy()[starts]
+    if 'High' in columns:
+        out['High'] = np.fmax.reduceat(frame['High'].to_numpy(dtype=np.float64), starts)
+    if 'Low' in columns:
+        out['Low'] = np.fmin.reduceat(frame['Low'].to_numpy(dtype=np.float64), starts)
+    if 'Close' in columns:
+        out['Close'] = frame['Close'].to_numpy()[stops - 1]
+    if 'Volume' in columns:
+        out['Volume'] = np.add.reduceat(np.nan_to_num(frame['Volume'].to_numpy(dtype=np.float64)), starts)
+    out['Bars'] = stops - starts
+    return pd.DataFrame(out)
+
+
+class OHLCVPyramid:
+    def __init__(self, store):
+        # store is the daily SymbolStore; the coarser levels are built from it
+        self.levels = [('daily', store)]
+        for name, freq in LEVELS:
+            resampled = resample_ohlcv(store.frame, freq, store.key, store.date_col)
+            self.levels.append((name, SymbolStore(resampled, store.key, store.date_col)))
+
+    def select(self, symbol, min_points, x_range=None):
+        # Coarsest (level name, store) with at least min_points bars of the
+        # symbol inside x_range (or its whole history); daily when none has
+        for name, store in reversed(self.levels):
+            if x_range:
+                lo, hi = store.window_bounds(symbol, *x_range)
+                count = hi - lo
+            else:
+                count = store.rows(symbol)
+            if count >= min_points:
+                return name, store
+        return self.levels[0]
@@ -0,0 +1,350 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from config import (DEMO_DATA, INFERENCE_BACKEND, MODEL_PATH, NSE_DATA_PATH, RESULTS_DIR, RETRAIN_BATCH_SIZE,
+                    RETRAIN_EPOCHS, TFLITE_MODEL_PATH)
+
+# Retraining of the NSE model outside the web workers. A run is a separate,
+# low-priority process (started from the dashboard or with
+# `python retraining.py`) that trains on the current NSE history, writes its
+# progress to a JSON status file and publishes the new model with os.replace,
+# so readers see either the old file or the new one, never a partial write.
+# Web workers notice the new file with a ModelWatcher and reload it.
+#
+#   results/retrain-status.json   state, progress and result of the last run
+#   results/retrain.lock          held by the running job (its pid)
+#   results/retrain.log           output of runs started from the dashboard
+
+STATUS_PATH = os.path.join(RESULTS_DIR, 'retrain-status.json')
+LOCK_PATH = os.path.join(RESULTS_DIR, 'retrain.lock')
+LOG_PATH = os.path.join(RESULTS_DIR, 'retrain.log')
+
+# Seconds between progress writes during training
+PROGRESS_INTERVAL = 0.5
+
+# States of a run that has not ended yet
+ACTIVE_STATES = ('queued', 'running', 'publishing')
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    # An exited child its parent has not reaped yet still answers signals
+    try:
+        with open(f'/proc/{pid}/stat') as handle:
+            return handle.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except (OSError, IndexError):
+        return True
+
+
+def read_status(path=STATUS_PATH):
+    try:
+        with open(path) as handle:
+            status = json.load(handle)
+    except (OSError, ValueError):
+        return {'state': 'idle'}
+    # A job that died without reporting (killed, out of memory) shows as failed
+    if status.get('state') in ACTIVE_STATES and not pid_alive(status.get('pid', 0)):
+        status.update(state='failed', error='retraining process exited unexpectedly')
+    return status
+
+
+def write_status(status, path=STATUS_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    status = dict(status, updated=time.time())
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as handle:
+        json.dump(status, handle)
+    os.replace(tmp_path, path)
+    return status
+
+
+def is_running(path=STATUS_PATH):
+    return read_status(path).get('state') in ACTIVE_STATES
+
+
+def acquire_lock(path=LOCK_PATH):
+    # One job at a time across every process on the host; a lock left by a
+    # dead job is taken over
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(path) as handle:
+                    holder = int(handle.read().strip() or 0)
+            except (OSError, ValueError):
+                holder = 0
+            if holder and pid_alive(holder):
+                return False
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as handle:
+            handle.write(str(os.getpid()))
+        return True
+    return False
+
+
+def hand_over_lock(pid, path=LOCK_PATH):
+    # Name another process (the job just started) as the holder
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as handle:
+        handle.write(str(pid))
+    os.replace(tmp_path, path)
+
+
+def release_lock(path=LOCK_PATH):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def load_closes(data_path, demo=False):
+    from data_loader import demo_nse_frame, load_nse
+
+    frame = demo_nse_frame() if demo else load_nse(data_path)
+    return frame['Close'].to_numpy(dtype='float64')
+
+
+def progress_callback(status, epochs, batches_per_epoch):
+    # Keras callback that reports epoch/batch progress to the status file at
+    # most every PROGRESS_INTERVAL seconds
+    from tensorflow.keras.callbacks import Callback
+
+    class Progress(Callback):
+        def __init__(self):
+            super().__init__()
+            self.epoch = 0
+            self.last_write = 0.0
+
+        def report(self, batch, logs, force=False):
+            now = time.monotonic()
+            if not force and now - self.last_write < PROGRESS_INTERVAL:
+                return
+            self.last_write = now
+            done = self.epoch * batches_per_epoch + batch
+            status.update(epoch=self.epoch + 1, batch=batch, batches=batches_per_epoch,
+                          progress=round(done / (epochs * batches_per_epoch), 4))
+            if logs and 'loss' in logs:
+                status['loss'] = float(logs['loss'])
+            write_status(status)
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch = epoch
+
+        def on_train_batch_end(self, batch, logs=None):
+            self.report(batch + 1, logs)
+
+        def on_epoch_end(self, epoch, logs=None):
+            self.report(batches_per_epoch, logs, force=True)
+
+    return Progress()
+
+
+def publish(model, model_path, tflite_path=None):
+    # Write next to the target and rename over it, so a reader never opens a
+    # half-written model; the TFLite conversion is published the same way
+    import hashlib
+
+    os.makedirs(os.path.dirname(os.path.abspath(model_path)), exist_ok=True)
+    directory, name = os.path.split(os.path.abspath(model_path))
+    tmp_path = os.path.join(directory, f'.{os.getpid()}.{name}')
+    model.save(tmp_path)
+    if tflite_path:
+        from tflite_backend import convert_to_tflite
+        # Convert before publishing either file, so a failed conversion
+        # leaves both old models in place
+        tflite_tmp = os.path.join(os.path.dirname(os.path.abspath(tflite_path)),
+                                  f'.{os.getpid()}.{os.path.basename(tflite_path)}')
+        convert_to_tflite(tmp_path, tflite_tmp)
+    with open(tmp_path, 'rb') as handle:
+        version = hashlib.sha1(handle.read()).hexdigest()[:12]
+    os.replace(tmp_path, model_path)
+    if tflite_path:
+        os.replace(tflite_tmp, tflite_path)
+    return version
+
+
+def retrain(data_path=NSE_DATA_PATH, model_path=MODEL_PATH, tflite_path=None, epochs=RETRAIN_EPOCHS,
+            batch_size=RETRAIN_BATCH_SIZE, demo=False):
+    from training import TRAIN_FRACTION, fit_lstm, train_split
+    from windows import WINDOW
+
+    status = {'state': 'running', 'pid': os.getpid(), 'started': time.time(), 'epochs': epochs,
+              'progress': 0.0, 'model_path': model_path}
+    write_status(status)
+    try:
+        closes = load_closes(data_path, demo)
+        windows = max(train_split(len(closes), TRAIN_FRACTION) - WINDOW, 0)
+        batches = max(-(-windows // batch_size), 1)
+        model, loss = fit_lstm(closes, epochs=epochs, batch_size=batch_size,
+                               callbacks=[progress_callback(status, epochs, batches)])
+        status.update(state='publishing', progress=1.0, loss=loss)
+        write_status(status)
+        status['version'] = publish(model, model_path, tflite_path)
+    except Exception as e:
+        status.update(state='failed', error=f'{type(e).__name__}: {e}')
+        write_status(status)
+        raise
+    status.update(state='finished', finished=time.time())
+    write_status(status)
+    return status
+
+
+def reap(process):
+    # Wait for a job started from this process so it does not linger as a
+    # zombie, and record a failure if it died without reporting one
+    process.wait()
+    try:
+        with open(STATUS_PATH) as handle:
+            status = json.load(handle)
+    except (OSError, ValueError):
+        return
+    if status.get('pid') == process.pid and status.get('state') in ACTIVE_STATES:
+        write_status(dict(status, state='failed', error=f'retraining process exited with status {process.returncode}'))
+
+
+def start_retraining(epochs=RETRAIN_EPOCHS, batch_size=RETRAIN_BATCH_SIZE):
+    # Launch a retraining process for the dashboard and return right away.
+    # Returns the current status; a run already in progress is left alone.
+    # The lock is taken before the status is checked, so concurrent clicks
+    # start one job, and is then handed over to that job.
+    if not acquire_lock():
+        # Another click is starting a job and has not written its status yet
+        status = read_status()
+        return status if status.get('state') in ACTIVE_STATES else {'state': 'queued'}
+    try:
+        status = read_status()
+        if status.get('state') in ACTIVE_STATES:
+            release_lock()
+            return status
+        args = [sys.executable, os.path.abspath(__file__), '--epochs', str(epochs), '--batch-size', str(batch_size),
+                '--lock-held']
+        if INFERENCE_BACKEND == 'tflite':
+            args += ['--tflite', TFLITE_MODEL_PATH]
+        if DEMO_DATA:
+            args.append('--demo')
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        with open(LOG_PATH, 'ab') as log:
+            process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+                                       cwd=os.path.dirname(os.path.abspath(__file__)), start_new_session=True)
+    except BaseException:
+        release_lock()
+        raise
+    status = write_status({'state': 'queued', 'pid': process.pid, 'started': time.time(), 'epochs': epochs,
+                           'progress': 0.0})
+    hand_over_lock(process.pid)
+    threading.Thread(target=reap, args=(process,), name='retrain-reaper', daemon=True).start()
+    return status
+
+
+def describe(status):
+    # One line for the dashboard and the CLI
+    state = status.get('state', 'idle')
+    if state == 'idle':
+        return "No retraining run yet"
+    if state == 'queued':
+        return "Retraining queued"
+    if state == 'running':
+        text = f"Retraining: epoch {status.get('epoch', 1)}/{status.get('epochs', 1)}, {status.get('progress', 0):.0%}"
+        if 'loss' in status:
+            text += f", loss {status['loss']:.5f}"
+        return text
+    if state == 'publishing':
+        return "Retraining: publishing model"
+    if state == 'finished':
+        finished = time.strftime('%Y-%m-%d %H:%M', time.localtime(status.get('finished', 0)))
+        return f"Model {status.get('version', '?')} published {finished} (loss {status.get('loss', float('nan')):.5f})"
+    return f"Retraining failed: {status.get('error', 'unknown error')}"
+
+
+class ModelWatcher(threading.Thread):
+    # Polls a model file and calls on_change() after it is replaced, so every
+    # web worker picks up a published model without a restart
+    def __init__(self, changed, on_change, interval=30.0):
+        super().__init__(name='model-watcher', daemon=True)
+        self.changed = changed
+        self.on_change = on_change
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if self.changed():
+                    self.on_change()
+            except Exception as e:
+                print(f"Model reload failed: {type(e).__name__}: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+def limit_resources(threads, niceness):
+    # Keep training from starving the web workers on the same host; thread
+    # limits have to be in place before TensorFlow starts its pools
+    if niceness:
+        try:
+            os.nice(niceness)
+        except (AttributeError, OSError):
+            pass
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retrain the NSE model and publish it")
+    parser.add_argument('--data', default=NSE_DATA_PATH, help="NSE history file")
+    parser.add_argument('--model', default=MODEL_PATH, help="Keras model to replace")
+    parser.add_argument('--tflite', help="also publish a TensorFlow Lite conversion here")
+    parser.add_argument('--epochs', type=int, default=RETRAIN_EPOCHS)
+    parser.add_argument('--batch-size', type=int, default=RETRAIN_BATCH_SIZE)
+    parser.add_argument('--demo', action='store_true', default=DEMO_DATA, help="train on generated demo data")
+    parser.add_argument('--threads', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="TensorFlow threads")
+    parser.add_argument('--nice', type=int, default=10, help="niceness increment for the job")
+    parser.add_argument('--status', action='store_true', help="print the last run's status and exit")
+    parser.add_argument('--lock-held', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.status:
+        print(describe(read_status()))
+        return 0
+    # Started from the dashboard, the lock was taken and handed to this job
+    if not args.lock_held and not acquire_lock():
+        print("Another retraining run is in progress")
+        return 2
+    try:
+        limit_resources(args.threads, args.nice)
+        started = time.perf_counter()
+        status = retrain(args.data, args.model, args.tflite, args.epochs, args.batch_size, args.demo)
+    except Exception as e:
+        print(f"Retraining failed: {type(e).__name__}: {e}")
+        return 1
+    finally:
+        release_lock()
+    print(f"{describe(status)} in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
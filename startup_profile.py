@@ -0,0 +1,31 @@
+import sys
+import time
+
+# Cold-start timing for app.py. Module-level setup marks each phase as it
+# finishes; `python app.py --profile-startup` runs the deferred work too,
+# prints the breakdown and exits instead of serving.
+
+# Dependencies that should only load once predictions are first needed
+HEAVY_MODULES = ('tensorflow', 'keras', 'sklearn', 'ai_edge_litert', 'tflite_runtime')
+
+_started = _last = time.perf_counter()
+phases = []
+
+
+def mark(name):
+    global _last
+    now = time.perf_counter()
+    phases.append((name, now - _last))
+    _last = now
+
+
+def heavy_modules_loaded():
+    return [name for name in HEAVY_MODULES if name in sys.modules]
+
+
+def report():
+    width = max(len(name) for name, _ in phases)
+    print("Startup profile:")
+    for name, seconds in phases:
+        print(f"  {name:<{width}}  {seconds * 1000:9.1f} ms")
+    print(f"  {'total':<{width}}  {(_last - _started) * 1000:9.1f} ms")
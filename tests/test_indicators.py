@@ -0,0 +1,39 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from indicators import compute  # noqa: E402
+
+
+def two_symbols(bars=60):
+    # Flat, symbol-sorted columns of symbols A and B, with B after A
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 2 * bars))
+    high = close + 1
+    low = close - 1
+    volume = rng.integers(1000, 5000, 2 * bars).astype(np.float64)
+    first = np.repeat([0, bars], bars)
+    return high, low, close, volume, first
+
+
+def test_nan_close_stays_within_its_symbol():
+    bars = 60
+    high, low, close, volume, first = two_symbols(bars)
+    clean = {name: compute(name, (20,) if name != 'bollinger' else (20, 2.0), high, low, close, volume, first)
+             for name in ('sma', 'bollinger', 'vwap')}
+
+    close = close.copy()
+    close[5] = np.nan
+    for name, expected in clean.items():
+        params = (20,) if name != 'bollinger' else (20, 2.0)
+        outputs = compute(name, params, high, low, close, volume, first)
+        for column, values in outputs.items():
+            # Symbol B is unaffected
+            np.testing.assert_allclose(values[bars:], expected[column][bars:], equal_nan=True)
+            assert not np.isnan(values[bars + 19:]).any()
+            # In A only the windows holding the NaN are undefined
+            assert np.isnan(values[5:25]).all()
+            np.testing.assert_allclose(values[25:bars], expected[column][25:bars])
@@ -0,0 +1,115 @@
+import argparse
+import os
+
+import numpy as np
+
+from inference import ModelUnavailable
+from windows import WINDOW
+
+# TensorFlow Lite serving for the LSTM. The Keras model is converted once at
+# build time (python tflite_backend.py saved_model.h5 saved_model.tflite) and
+# served through the standalone LiteRT / tflite-runtime interpreter, so web
+# workers don't need to import full TensorFlow just to run predictions.
+
+
+def interpreter_class():
+    # Prefer the lightweight interpreter packages; full TensorFlow also works
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        import tensorflow as tf
+        return tf.lite.Interpreter
+    except ImportError as e:
+        raise ModelUnavailable(f"No TensorFlow Lite interpreter is installed: {e}")
+
+
+class TFLiteBackend:
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreter = None
+        self._batch = None
+
+    def load(self):
+        if not os.path.exists(self.model_path):
+            raise ModelUnavailable(f"{self.model_path} does not exist; convert the Keras model with tflite_backend.py")
+        Interpreter = interpreter_class()
+        try:
+            interpreter = Interpreter(model_path=self.model_path, num_threads=self.num_threads)
+        except ValueError as e:
+            raise ModelUnavailable(f"Could not load {self.model_path}: {e}")
+        self._input = interpreter.get_input_details()[0]['index']
+        self._output = interpreter.get_output_details()[0]['index']
+        self.interpreter = interpreter
+
+    def _resize(self, batch, window):
+        # Reallocating tensors is only needed when the batch size changes
+        if self._batch != (batch, window):
+            self.interpreter.resize_tensor_input(self._input, [batch, window, 1])
+            self.interpreter.allocate_tensors()
+            self._batch = (batch, window)
+
+    def predict(self, windows, batch_size):
+        outputs = []
+        for start in range(0, len(windows), batch_size):
+            chunk = windows[start:start + batch_size]
+            self._resize(len(chunk), chunk.shape[1])
+            self.interpreter.set_tensor(self._input, chunk)
+            self.interpreter.invoke()
+            outputs.append(self.interpreter.get_tensor(self._output).reshape(-1).copy())
+        return np.concatenate(outputs)
+
+
+def convert_to_tflite(keras_path, tflite_path, window=WINDOW):
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(keras_path, compile=False)
+    if not model.layers:
+        raise ValueError(f"{keras_path} contains no layers")
+
+    # Unrolled LSTMs lower to plain TFLite ops that accept any batch size;
+    # the default while-loop form only converts with a fixed batch
+    def unrolled(layer):
+        config = layer.get_config()
+        if 'unroll' in config:
+            config['unroll'] = True
+        return layer.__class__.from_config(config)
+
+    converted = tf.keras.models.clone_model(model, input_tensors=tf.keras.Input(shape=(window, 1)),
+                                            clone_function=unrolled)
+    converted.set_weights(model.get_weights())
+    flatbuffer = tf.lite.TFLiteConverter.from_keras_model(converted).convert()
+
+    tmp_path = f'{tflite_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(flatbuffer)
+    os.replace(tmp_path, tflite_path)
+    return tflite_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert the Keras LSTM to TensorFlow Lite")
+    parser.add_argument('keras_model')
+    parser.add_argument('tflite_model', nargs='?', help="output path (default: keras_model with .tflite)")
+    args = parser.parse_args(argv)
+
+    output = args.tflite_model or os.path.splitext(args.keras_model)[0] + '.tflite'
+    try:
+        convert_to_tflite(args.keras_model, output)
+    except (OSError, ValueError) as e:
+        print(f"Conversion failed: {e}")
+        return 1
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes)")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
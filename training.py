@@ -0,0 +1,44 @@
+import numpy as np
+
+from inference import scale_series
+from windows import WINDOW, sliding_windows, window_targets
+
+# Share of each series used for training; the rest is the validation span
+TRAIN_FRACTION = 0.8
+
+
+def train_split(length, fraction=TRAIN_FRACTION):
+    return int(length * fraction)
+
+
+def build_lstm(window=WINDOW):
+    # The two-layer LSTM from mlp.ipynb
+    from tensorflow.keras.layers import LSTM, Dense, Input
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential([
+        Input(shape=(window, 1)),
+        LSTM(units=50, return_sequences=True),
+        LSTM(units=50),
+        Dense(1)
+    ])
+    model.compile(loss='mean_squared_error', optimizer='adam')
+    return model
+
+
+def fit_lstm(closes, epochs=1, batch_size=1, window=WINDOW, train_fraction=TRAIN_FRACTION,
+             model=None, callbacks=None):
+    # Scale the whole series, train on its first train_fraction and return
+    # the model with its final training loss
+    scaled, _ = scale_series(closes)
+    train = scaled[:train_split(len(scaled), train_fraction)]
+    x_train = sliding_windows(train, window)
+    y_train = window_targets(train, window)
+    if not len(x_train):
+        raise ValueError(f"Need more than {window} training bars, got {len(train)}")
+
+    if model is None:
+        model = build_lstm(window)
+    history = model.fit(np.ascontiguousarray(x_train), y_train, epochs=epochs,
+                        batch_size=batch_size, verbose=0, callbacks=callbacks)
+    return model, float(history.history['loss'][-1])
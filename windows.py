@@ -0,0 +1,42 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Number of past closing prices the LSTM sees per prediction
+WINDOW = 60
+
+
+def _as_series(values):
+    values = np.asarray(values)
+    if values.ndim == 2:
+        # Scaler output is [n, 1]; take the column as a view
+        values = values[:, 0]
+    return values
+
+
+def sliding_windows(values, window=WINDOW, drop_last=True):
+    # LSTM inputs of shape [samples, window, 1] where sample k holds
+    # values[k:k + window], i.e. the windows the notebooks build with
+    # `for i in range(window, len(values))`. The result is a read-only strided
+    # view, so no price is copied. drop_last=False adds the window ending at
+    # the last value, which is the input for forecasting the next bar.
+    values = _as_series(values)
+    if len(values) < window + (1 if drop_last else 0):
+        return np.empty((0, window, 1), dtype=values.dtype)
+    windows = sliding_window_view(values, window)
+    if drop_last:
+        windows = windows[:-1]
+    return windows[:, :, np.newaxis]
+
+
+def window_targets(values, window=WINDOW):
+    # Value following each window returned by sliding_windows()
+    return _as_series(values)[window:]
+
+
+def iter_window_batches(values, window=WINDOW, batch_size=4096, drop_last=True):
+    # Stream sliding_windows() in fixed-size batches for very long histories,
+    # so a caller that needs contiguous input (e.g. model.predict) only
+    # materializes one batch at a time
+    windows = sliding_windows(values, window, drop_last)
+    for start in range(0, len(windows), batch_size):
+        yield windows[start:start + batch_size]